@@ -1,5 +1,6 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 import joblib
+import json
 import os
 import sys
 
@@ -7,11 +8,17 @@ import sys
 sys.path.insert(0, 'classificadores')
 
 from modelo_respostas import GeradorRespostas
+from modelo_compacto import carregar_se_atualizado
+from pacotes_regras import TenantDesconhecido, obter_gerador, pacotes_em_cache, verificar_tenant
+from respostas_http import ArquivoEstatico, serializar_json
 
 app = Flask(__name__)
 
 # Carregar o modelo treinado
 MODEL_PATH = "classificadores/modelo_classificacao.pkl"
+# Gerado por classificadores/modelo_compacto.py; usado quando corresponde ao MODEL_PATH
+MODELO_COMPACTO_PATH = "classificadores/modelo_compacto"
+INTERFACE_PATH = "interface/index.html"
 
 # Inicializar gerador de respostas
 gerador_respostas = GeradorRespostas()
@@ -49,82 +56,162 @@ RESPOSTAS_SUGERIDAS = {
     ]
 }
 
+# Inferência escalonada: quando a probabilidade (calibrada no treinamento) da
+# classe prevista atinge o limiar, a resposta pré-definida é devolvida sem a
+# análise detalhada do GeradorRespostas. Classes fora do dicionário sempre
+# passam pela análise completa. As respostas da saída antecipada são as mesmas
+# para todos os tenants: o pacote do tenant só é compilado e usado quando há
+# análise detalhada. Com um modelo sem calibração a saída antecipada é
+# desativada, pois os limiares pressupõem probabilidades calibradas.
+SAIDA_ANTECIPADA_ATIVA = True
+LIMIAR_SAIDA_ANTECIPADA = {
+    "Improdutivo": 0.90,
+}
+
+# O pipeline e o gerador são compartilhados entre as threads do servidor e
+# apenas lidos durante as requisições (ver benchmarks/concorrencia.py)
 if not os.path.exists(MODEL_PATH):
     print(f"Erro: Modelo não encontrado em {MODEL_PATH}")
     print("Execute primeiro: python treinamento_modelo.py")
     pipeline = None
+    CLASSES = []
 else:
-    pipeline = joblib.load(MODEL_PATH)
-    print(f"Modelo carregado com sucesso de {MODEL_PATH}")
+    # O modelo compacto (mmap) é compartilhado entre os processos da API
+    pipeline = carregar_se_atualizado(MODELO_COMPACTO_PATH, MODEL_PATH)
+    if pipeline is not None:
+        print(f"Modelo compacto carregado de {pipeline.diretorio}")
+    else:
+        pipeline = joblib.load(MODEL_PATH)
+        print(f"Modelo carregado com sucesso de {MODEL_PATH}")
+    # Nomes das classes já como str, para não converter a cada requisição
+    CLASSES = [str(classe) for classe in pipeline.classes_]
+
+    calibrado = getattr(pipeline, "calibrado", None)
+    if calibrado is None:
+        calibrado = hasattr(pipeline.named_steps["classificador"], "calibrated_classifiers_")
+    if SAIDA_ANTECIPADA_ATIVA and not calibrado:
+        print("Aviso: modelo sem calibração de probabilidades; saída antecipada desativada")
+        SAIDA_ANTECIPADA_ATIVA = False
+
+# Interface carregada uma única vez, com gzip e ETag pré-calculados
+INTERFACE = ArquivoEstatico(INTERFACE_PATH, "text/html; charset=utf-8")
+
+
+def responder_json(corpo, codigo: int) -> Response:
+    return Response(serializar_json(corpo), status=codigo, mimetype='application/json')
 
 
 @app.route('/', methods=['GET'])
 def home():
     """Retorna a página HTML para interface de testes"""
-    return open('interface/index.html', 'r', encoding='utf-8').read()
+    codigo, corpo, cabecalhos = INTERFACE.responder(
+        request.headers.get('If-None-Match'),
+        request.headers.get('Accept-Encoding')
+    )
+    return Response(corpo, status=codigo, headers=cabecalhos)
 
 
-@app.route('/api/classificar', methods=['POST'])
-def classificar():
+def processar_classificacao(dados, tenant=None):
     """
-    Recebe um texto e retorna a classificação
+    Classifica o texto recebido e monta o corpo da resposta.
+    Retorna uma tupla (corpo, codigo_http) e é compartilhada entre a API
+    Flask e o servidor assíncrono (api_async.py).
     
-    Exemplo de requisição:
+    Exemplo de dados:
     {
-        "texto": "preciso de sua assistência com o prazo do projeto"
+        "texto": "preciso de sua assistência com o prazo do projeto",
+        "compacto": false,
+        "tenant": "financeiro"
     }
+    
+    Com "compacto": true o bloco "analise" não é calculado nem retornado.
+    Com "analise_completa": true a saída antecipada é ignorada.
+    O tenant (campo "tenant" ou cabeçalho X-Tenant) seleciona o pacote de
+    regras e templates em pacotes/<tenant>.json; na saída antecipada as
+    respostas pré-definidas são as mesmas para todos os tenants.
     """
     try:
         if pipeline is None:
-            return jsonify({
+            return {
                 "erro": "Modelo não carregado. Execute primeiro: python treinamento_modelo.py"
-            }), 500
-        
-        # Obter o JSON da requisição
-        dados = request.get_json()
+            }, 500
         
         if not dados or 'texto' not in dados:
-            return jsonify({
+            return {
                 "erro": "Campo 'texto' é obrigatório"
-            }), 400
+            }, 400
         
         texto = dados['texto'].strip()
+        compacto = bool(dados.get('compacto', False))
+        
+        # Tenant desconhecido é rejeitado mesmo quando houver saída antecipada
+        tenant = dados.get('tenant') or tenant
+        if tenant:
+            try:
+                verificar_tenant(tenant)
+            except TenantDesconhecido as e:
+                return {
+                    "erro": str(e)
+                }, 400
         
         if not texto:
-            return jsonify({
+            return {
                 "erro": "Texto não pode estar vazio"
-            }), 400
-        
-        # Fazer a predição
-        predicao = pipeline.predict([texto])[0]
+            }, 400
         
-        # Obter probabilidades (se disponível)
+        # Fazer a predição a partir das probabilidades (se disponíveis)
         try:
             probabilidades = pipeline.predict_proba([texto])[0]
-            classes = pipeline.named_steps['classificador'].classes_
-            confianca = {
-                classe: float(prob) 
-                for classe, prob in zip(classes, probabilidades)
-            }
+            predicao = CLASSES[int(probabilidades.argmax())]
+            confianca = dict(zip(CLASSES, probabilidades.tolist()))
         except:
+            predicao = str(pipeline.predict([texto])[0])
             confianca = {}
         
+        # Saída antecipada para emails classificados com alta confiança
+        limiar = LIMIAR_SAIDA_ANTECIPADA.get(predicao)
+        if (SAIDA_ANTECIPADA_ATIVA and limiar is not None and not dados.get('analise_completa')
+                and confianca.get(predicao, 0.0) >= limiar):
+            return {
+                "texto": texto,
+                "classificacao": predicao,
+                "confianca": confianca,
+                "respostas_sugeridas": RESPOSTAS_SUGERIDAS.get(predicao, []),
+                "saida_antecipada": True,
+                "sucesso": True
+            }, 200
+        
+        # Selecionar regras e templates do tenant (o modelo é o mesmo para todos)
+        if tenant:
+            try:
+                gerador = obter_gerador(tenant)
+            except TenantDesconhecido as e:
+                return {
+                    "erro": str(e)
+                }, 400
+            except ValueError as e:
+                # Pacote do tenant existe mas está malformado (erro de configuração)
+                return {
+                    "erro": f"Pacote de regras inválido para o tenant {tenant}: {e}",
+                    "sucesso": False
+                }, 500
+        else:
+            gerador = gerador_respostas
+        
         # Gerar respostas automáticas inteligentes
         try:
             # Gerar múltiplas opções de resposta avançadas
-            respostas_sugeridas = gerador_respostas.gerar_multiplas_opcoes_avancadas(texto, predicao, num_opcoes=3)
-            
-            # Extrair primeira opção para análises principais
-            resposta_principal = respostas_sugeridas[0] if respostas_sugeridas else {}
-            
-            # Análise de tons
-            sentimento = gerador_respostas.analisador.detectar_tons(texto)
+            respostas_sugeridas = gerador.gerar_multiplas_opcoes_avancadas(texto, predicao, num_opcoes=3)
             
-            # Detectar urgência
-            nivel_urgencia = gerador_respostas._detectar_urgencia_basica(texto)
-            
-            # Detectar tipos de problema
-            tipos_solicitacao = gerador_respostas.analisador.analisar_tipo_problema(texto)
+            if not compacto:
+                # Análise de tons
+                sentimento = gerador.analisador.detectar_tons(texto)
+                
+                # Detectar urgência
+                nivel_urgencia = gerador._detectar_urgencia_basica(texto)
+                
+                # Detectar tipos de problema
+                tipos_solicitacao = gerador.analisador.analisar_tipo_problema(texto)
             
             # Converter para formato simples para JSON
             respostas_formato_api = [
@@ -149,36 +236,76 @@ def classificar():
             nivel_urgencia = "média"
             tipos_solicitacao = {"tipo_principal": None}
         
-        return jsonify({
+        corpo = {
             "texto": texto,
             "classificacao": predicao,
             "confianca": confianca,
             "respostas_sugeridas": respostas_formato_api,
-            "analise": {
+            "saida_antecipada": False,
+            "sucesso": True
+        }
+        if not compacto:
+            corpo["analise"] = {
                 "sentimento": sentimento,
                 "urgencia": nivel_urgencia,
                 "tipo_principal": tipos_solicitacao.get("tipo_principal"),
                 "tipos_detectados": list(tipos_solicitacao.get("tipos", {}).keys())
-            },
-            "sucesso": True
-        }), 200
+            }
+        return corpo, 200
     
     except Exception as e:
-        return jsonify({
+        return {
             "erro": str(e),
             "sucesso": False
-        }), 500
+        }, 500
 
 
-@app.route('/api/status', methods=['GET'])
-def status():
-    """Retorna o status da API"""
+def classificar_corpo(corpo: bytes, tenant=None):
+    """
+    Decodifica o corpo JSON da requisição e chama processar_classificacao.
+    Usada pelas duas interfaces HTTP para que JSON inválido tenha a mesma
+    resposta (400) em ambas.
+    """
+    try:
+        dados = json.loads(corpo) if corpo else None
+    except ValueError:
+        return {
+            "erro": "JSON inválido",
+            "sucesso": False
+        }, 400
+    return processar_classificacao(dados, tenant)
+
+
+def obter_status():
+    """Monta o corpo da resposta de status da API"""
     modelo_carregado = pipeline is not None
-    return jsonify({
+    return {
         "status": "ativo",
         "modelo_carregado": modelo_carregado,
-        "modelo_arquivo": MODEL_PATH
-    }), 200
+        "modelo_arquivo": MODEL_PATH,
+        "saida_antecipada_ativa": SAIDA_ANTECIPADA_ATIVA,
+        "pacotes_em_cache": pacotes_em_cache()
+    }
+
+
+@app.route('/api/classificar', methods=['POST'])
+def classificar():
+    """
+    Recebe um texto e retorna a classificação
+    
+    Exemplo de requisição:
+    {
+        "texto": "preciso de sua assistência com o prazo do projeto"
+    }
+    """
+    corpo, codigo = classificar_corpo(request.get_data(), request.headers.get('X-Tenant'))
+    return responder_json(corpo, codigo)
+
+
+@app.route('/api/status', methods=['GET'])
+def status():
+    """Retorna o status da API"""
+    return responder_json(obter_status(), 200)
 
 
 if __name__ == '__main__':
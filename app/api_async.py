@@ -0,0 +1,269 @@
+"""
+Servidor HTTP assíncrono (asyncio) com as mesmas rotas da API Flask:
+
+- GET  /                - Interface web
+- GET  /api/status      - Status da API
+- POST /api/classificar - Classifica um email e retorna respostas sugeridas
+
+A classificação e o GeradorRespostas são executados em um pool de threads
+limitado, enquanto o laço de eventos cuida apenas da rede. Conexões HTTP/1.1
+são mantidas abertas (keep-alive) e requisições enviadas em pipeline são
+processadas em paralelo, com as respostas devolvidas na ordem de chegada.
+Cada cliente (endereço IP) tem um número máximo de requisições simultâneas.
+
+Uso:
+    python api_async.py
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+
+import api
+from respostas_http import serializar_json
+
+HOST = "127.0.0.1"
+PORTA = 5001
+
+# Threads dedicadas ao trabalho de CPU (modelo e gerador de respostas)
+MAX_WORKERS = os.cpu_count() or 4
+# Trabalhos aceitos pelo pool além dos que já estão executando
+MAX_PENDENTES = MAX_WORKERS * 4
+# Requisições simultâneas por cliente (somando todas as suas conexões)
+MAX_POR_CLIENTE = 8
+# Requisições em pipeline aguardando resposta em uma mesma conexão
+MAX_PIPELINE = 16
+
+MAX_CABECALHO = 16 * 1024
+MAX_CORPO = 1024 * 1024
+TIMEOUT_OCIOSO = 15
+
+ROTAS = {
+    "/": "GET",
+    "/api/status": "GET",
+    "/api/classificar": "POST",
+}
+
+
+class RequisicaoInvalida(Exception):
+    def __init__(self, codigo: int, mensagem: str):
+        super().__init__(mensagem)
+        self.codigo = codigo
+
+
+class Requisicao:
+    def __init__(self, metodo: str, caminho: str, versao: str, cabecalhos: Dict[str, str], corpo: bytes):
+        self.metodo = metodo
+        self.caminho = caminho
+        self.versao = versao
+        self.cabecalhos = cabecalhos
+        self.corpo = corpo
+
+    @property
+    def manter_conexao(self) -> bool:
+        conexao = self.cabecalhos.get("connection", "").lower()
+        if self.versao == "HTTP/1.0":
+            return conexao == "keep-alive"
+        return conexao != "close"
+
+
+class ServidorAssincrono:
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_por_cliente: int = MAX_POR_CLIENTE):
+        self.max_workers = max_workers
+        self.max_por_cliente = max_por_cliente
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="classificador")
+        # Semáforo e número de conexões abertas por endereço de cliente
+        self._clientes: Dict[str, List] = {}
+        self._vagas_executor: Optional[asyncio.Semaphore] = None
+        self._servidor: Optional[asyncio.AbstractServer] = None
+
+    async def iniciar(self, host: str = HOST, porta: int = PORTA) -> asyncio.AbstractServer:
+        self._vagas_executor = asyncio.Semaphore(self.max_workers + MAX_PENDENTES)
+        self._servidor = await asyncio.start_server(
+            self._atender_conexao, host, porta, limit=MAX_CABECALHO
+        )
+        return self._servidor
+
+    async def encerrar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    def _registrar_cliente(self, cliente: str) -> asyncio.Semaphore:
+        if cliente not in self._clientes:
+            self._clientes[cliente] = [asyncio.Semaphore(self.max_por_cliente), 0]
+        self._clientes[cliente][1] += 1
+        return self._clientes[cliente][0]
+
+    def _liberar_cliente(self, cliente: str) -> None:
+        self._clientes[cliente][1] -= 1
+        if self._clientes[cliente][1] == 0:
+            del self._clientes[cliente]
+
+    async def _atender_conexao(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        cliente = (writer.get_extra_info("peername") or ("desconhecido",))[0]
+        limite = self._registrar_cliente(cliente)
+        # Respostas pendentes na ordem em que as requisições chegaram
+        fila: asyncio.Queue = asyncio.Queue(maxsize=MAX_PIPELINE)
+        escritor = asyncio.create_task(self._escrever_respostas(fila, writer))
+
+        try:
+            while True:
+                try:
+                    requisicao = await asyncio.wait_for(self._ler_requisicao(reader), TIMEOUT_OCIOSO)
+                except RequisicaoInvalida as e:
+                    resposta = self._montar_erro(e.codigo, str(e), manter_conexao=False)
+                    await fila.put(asyncio.create_task(self._pronta(resposta)))
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                if requisicao is None:
+                    break
+
+                await fila.put(asyncio.create_task(self._responder(requisicao, limite)))
+                if not requisicao.manter_conexao:
+                    break
+        finally:
+            await fila.put(None)
+            await escritor
+            self._liberar_cliente(cliente)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _escrever_respostas(self, fila: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        conectado = True
+        while True:
+            tarefa = await fila.get()
+            if tarefa is None:
+                return
+            if not conectado:
+                tarefa.cancel()
+                continue
+            resposta = await tarefa
+            try:
+                writer.write(resposta)
+                await writer.drain()
+            except ConnectionError:
+                conectado = False
+
+    async def _pronta(self, resposta: bytes) -> bytes:
+        return resposta
+
+    async def _ler_requisicao(self, reader: asyncio.StreamReader) -> Optional[Requisicao]:
+        try:
+            bruto = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise RequisicaoInvalida(431, "Cabeçalhos muito grandes")
+
+        linhas = bruto.decode("latin-1").split("\r\n")
+        partes = linhas[0].split()
+        if len(partes) != 3 or not partes[2].startswith("HTTP/1."):
+            raise RequisicaoInvalida(400, "Linha de requisição inválida")
+        metodo, alvo, versao = partes
+
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if not linha:
+                continue
+            nome, separador, valor = linha.partition(":")
+            if not separador:
+                raise RequisicaoInvalida(400, "Cabeçalho inválido")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if "transfer-encoding" in cabecalhos:
+            raise RequisicaoInvalida(501, "Transfer-Encoding não suportado")
+
+        try:
+            tamanho = int(cabecalhos.get("content-length", 0))
+        except ValueError:
+            raise RequisicaoInvalida(400, "Content-Length inválido")
+        if tamanho < 0:
+            raise RequisicaoInvalida(400, "Content-Length inválido")
+        if tamanho > MAX_CORPO:
+            raise RequisicaoInvalida(413, "Corpo da requisição muito grande")
+
+        corpo = await reader.readexactly(tamanho) if tamanho else b""
+        return Requisicao(metodo, alvo.split("?", 1)[0], versao, cabecalhos, corpo)
+
+    async def _responder(self, requisicao: Requisicao, limite: asyncio.Semaphore) -> bytes:
+        async with limite:
+            try:
+                codigo, tipo, corpo, extras = await self._rotear(requisicao)
+            except Exception as e:
+                codigo, tipo, corpo, extras = 500, *self._json({"erro": str(e), "sucesso": False}), {}
+        return self._montar_resposta(codigo, tipo, corpo, requisicao.manter_conexao, extras)
+
+    async def _rotear(self, requisicao: Requisicao) -> Tuple[int, str, bytes, Dict[str, str]]:
+        metodo_permitido = ROTAS.get(requisicao.caminho)
+        if metodo_permitido is None:
+            return (404, *self._json({"erro": "Rota não encontrada"}), {})
+        if requisicao.metodo != metodo_permitido:
+            return (405, *self._json({"erro": "Método não permitido"}), {"Allow": metodo_permitido})
+
+        if requisicao.caminho == "/":
+            codigo, corpo, cabecalhos = api.INTERFACE.responder(
+                requisicao.cabecalhos.get("if-none-match"),
+                requisicao.cabecalhos.get("accept-encoding")
+            )
+            tipo = cabecalhos.pop("Content-Type", None)
+            return codigo, tipo, corpo, cabecalhos
+
+        if requisicao.caminho == "/api/status":
+            return (200, *self._json(api.obter_status()), {})
+
+        corpo, codigo = await self._executar(
+            api.classificar_corpo, requisicao.corpo, requisicao.cabecalhos.get("x-tenant")
+        )
+        return (codigo, *self._json(corpo), {})
+
+    async def _executar(self, funcao, *args):
+        # Limita o trabalho enfileirado no pool para não acumular memória sob carga
+        async with self._vagas_executor:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, funcao, *args)
+
+    def _json(self, dados) -> Tuple[str, bytes]:
+        return "application/json", serializar_json(dados)
+
+    def _montar_erro(self, codigo: int, mensagem: str, manter_conexao: bool) -> bytes:
+        tipo, corpo = self._json({"erro": mensagem, "sucesso": False})
+        return self._montar_resposta(codigo, tipo, corpo, manter_conexao, {})
+
+    def _montar_resposta(self, codigo: int, tipo: Optional[str], corpo: bytes, manter_conexao: bool,
+                         extras: Dict[str, str]) -> bytes:
+        linhas = [f"HTTP/1.1 {codigo} {HTTPStatus(codigo).phrase}"]
+        if tipo:
+            linhas.append(f"Content-Type: {tipo}")
+        linhas.append(f"Content-Length: {len(corpo)}")
+        if manter_conexao:
+            linhas.append("Connection: keep-alive")
+            linhas.append(f"Keep-Alive: timeout={TIMEOUT_OCIOSO}")
+        else:
+            linhas.append("Connection: close")
+        linhas.extend(f"{nome}: {valor}" for nome, valor in extras.items())
+        return ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + corpo
+
+
+async def servir(host: str = HOST, porta: int = PORTA, max_por_cliente: int = MAX_POR_CLIENTE) -> None:
+    servidor = ServidorAssincrono(max_por_cliente=max_por_cliente)
+    await servidor.iniciar(host, porta)
+    print(f"Servidor assíncrono disponível em http://{host}:{porta}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.encerrar()
+
+
+if __name__ == '__main__':
+    asyncio.run(servir())
@@ -0,0 +1,104 @@
+"""
+Teste de estresse e benchmark de inferência concorrente.
+
+Executa o pipeline de classificação, o GeradorRespostas e o pré-processador
+a partir de várias threads sobre os MESMOS objetos e verifica que os
+resultados são idênticos aos obtidos em execução serial. Em seguida mede a
+vazão com 1, 2, 4 e 8 threads.
+
+Uso (a partir da pasta app/):
+    python benchmarks/concorrencia.py
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+
+sys.path.insert(0, 'classificadores')
+
+from modelo_respostas import GeradorRespostas
+from pre_processamento import PreProcessadorEmail
+
+MODEL_PATH = "classificadores/modelo_classificacao.pkl"
+
+EMAILS = [
+    "preciso de sua assistência com o prazo do projeto",
+    "parabéns pelo excelente trabalho que você realizou",
+    "URGENTE: o sistema está fora do ar desde ontem, ticket #4521",
+    "Olá, estou recebendo erro: 500 no ambiente: producao, versão 2.3.1",
+    "Bom dia pessoal, obrigado pela ajuda de ontem!",
+    "Poderia liberar meu acesso ao gitlab? Preciso para hoje",
+    "Suspeita de vazamento de dados no servidor, por favor verificar",
+    "O relatório de backup está muito lento e dando timeout",
+]
+
+NUM_REPETICOES = 50
+
+
+def inferir(pipeline, gerador, preprocessador, texto):
+    predicao = pipeline.predict([texto])[0] if pipeline is not None else "Produtivo"
+    probabilidades = (
+        tuple(float(p) for p in pipeline.predict_proba([texto])[0])
+        if pipeline is not None else ()
+    )
+    respostas = gerador.gerar_multiplas_opcoes_avancadas(texto, predicao, num_opcoes=3)
+    return (
+        predicao,
+        probabilidades,
+        repr(respostas),
+        repr(gerador.analisador.detectar_tons(texto)),
+        preprocessador.preprocessar(texto) if preprocessador is not None else "",
+    )
+
+
+def verificar_determinismo(pipeline, gerador, preprocessador, num_threads):
+    referencia = {texto: inferir(pipeline, gerador, preprocessador, texto) for texto in EMAILS}
+    tarefas = EMAILS * NUM_REPETICOES
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        resultados = list(executor.map(
+            lambda texto: (texto, inferir(pipeline, gerador, preprocessador, texto)),
+            tarefas
+        ))
+
+    divergencias = [texto for texto, resultado in resultados if resultado != referencia[texto]]
+    if divergencias:
+        raise AssertionError(
+            f"{len(divergencias)} resultados divergentes com {num_threads} threads"
+        )
+    print(f"  {num_threads:>2} threads: {len(resultados)} resultados idênticos ao serial")
+
+
+def medir_vazao(pipeline, gerador, preprocessador, num_threads):
+    tarefas = EMAILS * NUM_REPETICOES
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(lambda texto: inferir(pipeline, gerador, preprocessador, texto), tarefas))
+    duracao = time.perf_counter() - inicio
+    return len(tarefas) / duracao
+
+
+if __name__ == "__main__":
+    pipeline = joblib.load(MODEL_PATH) if os.path.exists(MODEL_PATH) else None
+    if pipeline is None:
+        print(f"Aviso: modelo não encontrado em {MODEL_PATH}, medindo apenas o gerador")
+
+    gerador = GeradorRespostas()
+    try:
+        preprocessador = PreProcessadorEmail()
+    except OSError:
+        print("Aviso: modelo spaCy não instalado, pré-processamento não será medido")
+        preprocessador = None
+
+    print("Verificando determinismo com objetos compartilhados...")
+    for num_threads in (2, 4, 8, 16):
+        verificar_determinismo(pipeline, gerador, preprocessador, num_threads)
+
+    print("\nEscalabilidade (emails/s):")
+    base = None
+    for num_threads in (1, 2, 4, 8):
+        vazao = medir_vazao(pipeline, gerador, preprocessador, num_threads)
+        base = base or vazao
+        print(f"  {num_threads:>2} threads: {vazao:8.1f} emails/s ({vazao / base:.2f}x)")
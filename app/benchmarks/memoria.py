@@ -0,0 +1,111 @@
+"""
+Perfil de memória dos componentes carregados por um worker da API.
+
+Carrega cada componente em sequência e reporta o aumento de RSS, além do
+tamanho estimado das principais estruturas (vocabulário, stop_words_,
+coeficientes). O modelo compacto é medido antes e depois de uma predição,
+já que suas páginas (mmap) só entram no RSS quando lidas e são
+compartilhadas entre processos.
+
+Uso (a partir da pasta app/):
+    python benchmarks/memoria.py
+"""
+import gc
+import os
+import resource
+import sys
+
+sys.path.insert(0, 'classificadores')
+
+import joblib
+import numpy as np
+# Módulos importados ao desserializar o pipeline entram na linha de base
+import sklearn.calibration
+import sklearn.feature_extraction.text
+import sklearn.linear_model
+import sklearn.pipeline
+
+from modelo_compacto import ModeloCompacto, versao_atual
+
+MODEL_PATH = "classificadores/modelo_classificacao.pkl"
+MODELO_COMPACTO_PATH = "classificadores/modelo_compacto"
+
+
+def rss_mb() -> float:
+    """RSS atual do processo (Linux) ou pico de RSS nas demais plataformas"""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2 ** 20 if sys.platform == "darwin" else pico / 2 ** 10
+
+
+def tamanho_mb(objeto) -> float:
+    """Tamanho aproximado de dicts/sets de str e arrays numpy"""
+    if objeto is None:
+        return 0.0
+    if isinstance(objeto, np.ndarray):
+        return objeto.nbytes / 2 ** 20
+    total = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        total += sum(sys.getsizeof(chave) + sys.getsizeof(valor) for chave, valor in objeto.items())
+    elif isinstance(objeto, (set, frozenset, list, tuple)):
+        total += sum(sys.getsizeof(item) for item in objeto)
+    return total / 2 ** 20
+
+
+class Perfil:
+    def __init__(self):
+        gc.collect()
+        self.anterior = rss_mb()
+        print(f"{'componente':<40}{'RSS +MB':>10}{'RSS total':>12}")
+        print(f"{'base (imports numpy/sklearn)':<40}{'':>10}{self.anterior:>12.1f}")
+
+    def marcar(self, nome: str) -> None:
+        gc.collect()
+        atual = rss_mb()
+        print(f"{nome:<40}{atual - self.anterior:>10.1f}{atual:>12.1f}")
+        self.anterior = atual
+
+
+def detalhar(nome: str, valor_mb: float) -> None:
+    print(f"    {nome:<36}{valor_mb:>10.2f} MB")
+
+
+if __name__ == "__main__":
+    perfil = Perfil()
+
+    pipeline = joblib.load(MODEL_PATH)
+    perfil.marcar("pipeline (joblib)")
+    tfidf = pipeline.named_steps["tfidf"]
+    classificador = pipeline.named_steps["classificador"]
+    detalhar(f"vocabulary_ ({len(tfidf.vocabulary_)} termos)", tamanho_mb(tfidf.vocabulary_))
+    detalhar("stop_words_", tamanho_mb(getattr(tfidf, "stop_words_", None)))
+    detalhar("idf_", tamanho_mb(tfidf.idf_))
+    membros = getattr(classificador, "calibrated_classifiers_", None)
+    estimadores = [membro.estimator for membro in membros] if membros else [classificador]
+    detalhar(f"coeficientes ({len(estimadores)} estimadores)",
+             sum(tamanho_mb(estimador.coef_) for estimador in estimadores))
+
+    from modelo_respostas import GeradorRespostas
+    perfil.marcar("import modelo_respostas (spaCy)")
+
+    gerador = GeradorRespostas()
+    perfil.marcar("GeradorRespostas")
+    detalhar("vocabulário do sugeridor de tipos", tamanho_mb(gerador._tfidf.vocabulary_))
+
+    if versao_atual(MODELO_COMPACTO_PATH) is not None:
+        compacto = ModeloCompacto(MODELO_COMPACTO_PATH)
+        perfil.marcar("modelo compacto (mmap, não lido)")
+        compacto.predict(["preciso de acesso ao sistema"])
+        perfil.marcar("modelo compacto (após predição)")
+        detalhar("vocabulario", tamanho_mb(np.asarray(compacto.vocabulario)))
+        detalhar("idf + pesos (float32)", tamanho_mb(np.asarray(compacto.idf)) + tamanho_mb(np.asarray(compacto.pesos)))
+
+        del pipeline, tfidf, classificador, estimadores, membros
+        perfil.marcar("pipeline liberado")
+    else:
+        print(f"\nModelo compacto não encontrado em {MODELO_COMPACTO_PATH}; "
+              f"execute classificadores/modelo_compacto.py")
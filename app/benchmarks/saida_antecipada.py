@@ -0,0 +1,61 @@
+"""
+Fração de emails com saída antecipada e impacto na latência média.
+
+Passa os emails rotulados da base por processar_classificacao duas vezes:
+com a análise completa forçada e no modo escalonado (padrão da API).
+
+Uso (a partir da pasta app/):
+    python benchmarks/saida_antecipada.py
+"""
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, '.')
+
+import api
+
+ARQUIVO_EMAILS = "database/emails_produtivos_improdutivos.csv"
+NUM_EMAILS = 1000
+
+
+def medir(textos, analise_completa: bool):
+    latencias = []
+    saidas = []
+    for texto in textos:
+        inicio = time.perf_counter()
+        corpo, _ = api.processar_classificacao({"texto": texto, "analise_completa": analise_completa})
+        latencias.append(time.perf_counter() - inicio)
+        saidas.append(corpo.get("saida_antecipada", False))
+    return latencias, saidas
+
+
+if __name__ == "__main__":
+    if api.pipeline is None:
+        print("Modelo não carregado; execute primeiro o treinamento")
+        sys.exit(1)
+
+    df = pd.read_csv(ARQUIVO_EMAILS).dropna(subset=["texto", "label"])
+    df = df.sample(n=min(NUM_EMAILS, len(df)), random_state=42)
+    textos = df["texto"].astype(str).tolist()
+    labels = df["label"].tolist()
+
+    # Aquecimento
+    medir(textos[:20], analise_completa=True)
+
+    latencias_completa, _ = medir(textos, analise_completa=True)
+    latencias_escalonada, saidas = medir(textos, analise_completa=False)
+
+    media_completa = sum(latencias_completa) / len(latencias_completa) * 1000
+    media_escalonada = sum(latencias_escalonada) / len(latencias_escalonada) * 1000
+    num_saidas = sum(saidas)
+    saidas_erradas = sum(1 for saiu, label in zip(saidas, labels) if saiu and label != "Improdutivo")
+
+    print(f"Emails avaliados:          {len(textos)}")
+    print(f"Limiares:                  {api.LIMIAR_SAIDA_ANTECIPADA}")
+    print(f"Saída antecipada:          {num_saidas} ({num_saidas / len(textos):.1%})")
+    print(f"  rotulados Produtivo:     {saidas_erradas}")
+    print(f"Latência média completa:   {media_completa:.3f} ms")
+    print(f"Latência média escalonada: {media_escalonada:.3f} ms "
+          f"({(media_escalonada - media_completa) / media_completa:+.1%})")
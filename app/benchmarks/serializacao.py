@@ -0,0 +1,90 @@
+"""
+Medição de bytes trafegados e tempo de serialização das respostas.
+
+Compara, para a resposta de /api/classificar, o jsonify do Flask com o
+serializar_json (json compacto e orjson, se instalado), nos modos completo
+e compacto. Para a interface (/), compara a leitura do disco a cada
+requisição com o arquivo pré-carregado (gzip e 304 Not Modified).
+
+Uso (a partir da pasta app/):
+    python benchmarks/serializacao.py
+"""
+import gzip
+import sys
+import timeit
+
+sys.path.insert(0, '.')
+
+import api
+import respostas_http
+from respostas_http import serializar_json
+
+EMAILS = [
+    "preciso de sua assistência com o prazo do projeto",
+    "parabéns pelo excelente trabalho que você realizou",
+    "URGENTE: o sistema está fora do ar desde ontem, ticket #4521",
+    "Olá, estou recebendo erro: 500 no ambiente: producao, versão 2.3.1",
+]
+
+REPETICOES = 2000
+
+
+def microssegundos(funcao) -> float:
+    return timeit.timeit(funcao, number=REPETICOES) / REPETICOES * 1e6
+
+
+def serializar_json_padrao(dados) -> bytes:
+    orjson = respostas_http.orjson
+    respostas_http.orjson = None
+    try:
+        return serializar_json(dados)
+    finally:
+        respostas_http.orjson = orjson
+
+
+def medir_classificacao() -> None:
+    serializadores = {
+        "jsonify (Flask)": lambda dados: api.app.json.dumps(dados).encode("utf-8"),
+        "json compacto": serializar_json_padrao,
+    }
+    if respostas_http.orjson is not None:
+        serializadores["orjson"] = serializar_json
+
+    print("POST /api/classificar (média por resposta)")
+    print(f"{'modo':<10}{'serializador':<18}{'bytes':>8}{'gzip':>8}{'µs':>10}")
+    for compacto in (False, True):
+        corpos = [api.processar_classificacao({"texto": texto, "compacto": compacto})[0] for texto in EMAILS]
+        modo = "compacto" if compacto else "completo"
+        for nome, serializador in serializadores.items():
+            tamanhos = [len(serializador(corpo)) for corpo in corpos]
+            tamanhos_gzip = [len(gzip.compress(serializador(corpo))) for corpo in corpos]
+            tempo = sum(microssegundos(lambda: serializador(corpo)) for corpo in corpos) / len(corpos)
+            print(f"{modo:<10}{nome:<18}{sum(tamanhos) / len(tamanhos):>8.0f}"
+                  f"{sum(tamanhos_gzip) / len(tamanhos_gzip):>8.0f}{tempo:>10.1f}")
+
+
+def ler_do_disco() -> str:
+    with open(api.INTERFACE_PATH, 'r', encoding='utf-8') as arquivo:
+        return arquivo.read()
+
+
+def medir_interface() -> None:
+    interface = api.INTERFACE
+    cenarios = {
+        "disco a cada GET": (lambda: ler_do_disco(), len(ler_do_disco().encode("utf-8"))),
+        "pré-carregado": (lambda: interface.responder(), len(interface.responder()[1])),
+        "pré-carregado gzip": (lambda: interface.responder(None, "gzip"), len(interface.responder(None, "gzip")[1])),
+        "304 (ETag)": (lambda: interface.responder(interface.etag), len(interface.responder(interface.etag)[1])),
+    }
+    print("\nGET / (corpo da resposta)")
+    print(f"{'cenário':<22}{'bytes':>8}{'µs':>10}")
+    for nome, (funcao, tamanho) in cenarios.items():
+        print(f"{nome:<22}{tamanho:>8}{microssegundos(funcao):>10.1f}")
+
+
+if __name__ == "__main__":
+    if api.pipeline is None:
+        print("Modelo não carregado; execute primeiro o treinamento")
+    else:
+        medir_classificacao()
+    medir_interface()
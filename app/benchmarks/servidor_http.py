@@ -0,0 +1,143 @@
+"""
+Benchmark da API Flask versus o servidor assíncrono (api_async.py).
+
+Cada servidor roda em um processo separado e recebe POST /api/classificar
+de 1, 50 e 500 conexões simultâneas com keep-alive. São reportadas as
+requisições por segundo e as latências p50, p99 e máxima.
+
+Todas as conexões partem de 127.0.0.1; o limite por cliente do servidor
+assíncrono é elevado acima de max(CONEXOES) para medir a capacidade do
+servidor, e não o limitador por endereço.
+
+Uso (a partir da pasta app/):
+    python benchmarks/servidor_http.py
+"""
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+HOST = "127.0.0.1"
+PORTA_FLASK = 5100
+PORTA_ASYNC = 5101
+CONEXOES = (1, 50, 500)
+MAX_POR_CLIENTE_ASYNC = max(CONEXOES) + 1
+DURACAO = 10
+AQUECIMENTO = 2
+
+SERVIDORES = {
+    "flask": (
+        "import api\n"
+        "from werkzeug.serving import run_simple, WSGIRequestHandler\n"
+        "WSGIRequestHandler.protocol_version = 'HTTP/1.1'\n"
+        f"run_simple('{HOST}', {PORTA_FLASK}, api.app, threaded=True)\n",
+        PORTA_FLASK,
+    ),
+    "asyncio": (
+        "import asyncio, api_async\n"
+        f"asyncio.run(api_async.servir('{HOST}', {PORTA_ASYNC}, max_por_cliente={MAX_POR_CLIENTE_ASYNC}))\n",
+        PORTA_ASYNC,
+    ),
+}
+
+CORPO = json.dumps({"texto": "URGENTE: o sistema está fora do ar desde ontem, ticket #4521"}).encode("utf-8")
+REQUISICAO = (
+    f"POST /api/classificar HTTP/1.1\r\n"
+    f"Host: {HOST}\r\n"
+    f"Content-Type: application/json\r\n"
+    f"Content-Length: {len(CORPO)}\r\n"
+    f"\r\n"
+).encode("latin-1") + CORPO
+
+
+async def ler_resposta(reader: asyncio.StreamReader):
+    cabecalho = await reader.readuntil(b"\r\n\r\n")
+    linhas = cabecalho.decode("latin-1").split("\r\n")
+    codigo = int(linhas[0].split()[1])
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        nome, _, valor = linha.partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    await reader.readexactly(int(cabecalhos.get("content-length", 0)))
+    manter = cabecalhos.get("connection", "").lower() != "close" and linhas[0].startswith("HTTP/1.1")
+    return codigo, manter
+
+
+async def cliente(porta: int, fim: float, latencias: list, erros: list) -> None:
+    conexao = None
+    while time.perf_counter() < fim:
+        try:
+            if conexao is None:
+                conexao = await asyncio.open_connection(HOST, porta)
+            reader, writer = conexao
+            inicio = time.perf_counter()
+            writer.write(REQUISICAO)
+            await writer.drain()
+            codigo, manter = await ler_resposta(reader)
+            latencias.append(time.perf_counter() - inicio)
+            if codigo != 200:
+                erros.append(codigo)
+            if not manter:
+                writer.close()
+                conexao = None
+        except (OSError, asyncio.IncompleteReadError) as e:
+            erros.append(type(e).__name__)
+            conexao = None
+            await asyncio.sleep(0.01)
+    if conexao is not None:
+        conexao[1].close()
+
+
+async def medir(porta: int, num_conexoes: int, duracao: float = DURACAO) -> dict:
+    latencias = []
+    erros = []
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    await asyncio.gather(*(cliente(porta, fim, latencias, erros) for _ in range(num_conexoes)))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000 if latencias else 0.0
+    return {
+        "rps": len(latencias) / duracao,
+        "p50": percentil(0.50),
+        "p99": percentil(0.99),
+        "max": latencias[-1] * 1000 if latencias else 0.0,
+        "erros": len(erros),
+    }
+
+
+async def aguardar_servidor(porta: int, timeout: float = 120) -> None:
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        try:
+            _, writer = await asyncio.open_connection(HOST, porta)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Servidor na porta {porta} não respondeu")
+
+
+async def main() -> None:
+    print(f"Limite por cliente do servidor assíncrono: {MAX_POR_CLIENTE_ASYNC} requisições simultâneas\n")
+    print(f"{'servidor':<10}{'conexões':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'erros':>8}")
+    for nome, (codigo, porta) in SERVIDORES.items():
+        processo = subprocess.Popen([sys.executable, "-c", codigo], stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL)
+        try:
+            await aguardar_servidor(porta)
+            # Aquecimento: carrega caches do modelo e do spaCy nas threads
+            await medir(porta, 4, AQUECIMENTO)
+            for num_conexoes in CONEXOES:
+                r = await medir(porta, num_conexoes)
+                print(f"{nome:<10}{num_conexoes:>10}{r['rps']:>10.1f}{r['p50']:>10.1f}"
+                      f"{r['p99']:>10.1f}{r['max']:>10.1f}{r['erros']:>8}")
+        finally:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
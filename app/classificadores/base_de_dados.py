@@ -7,6 +7,28 @@ ARQUIVO_ENTRADA = "../database/emails_produtivos_improdutivos.csv"
 ARQUIVO_SAIDA = "../database/emails_processados.csv"
 
 
+def preprocessar_dataframe(df: pd.DataFrame, preprocessador: PreProcessadorEmail) -> pd.DataFrame:
+    """Pré-processa as colunas 'texto' e 'label', descartando textos que ficam vazios"""
+    registros = []
+    
+    for idx, linha in df.iterrows():
+        texto = str(linha['texto']).strip()
+        label = str(linha['label']).strip()
+        
+        # Pré-processar o texto
+        texto_preprocessado = preprocessador.preprocessar(texto)
+        
+        # Adicionar apenas se houve resultado
+        if texto_preprocessado:
+            registros.append({
+                "texto": texto,
+                "texto_preprocessado": texto_preprocessado,
+                "label": label
+            })
+    
+    return pd.DataFrame(registros, columns=["texto", "texto_preprocessado", "label"])
+
+
 def preprocessar_emails_csv(arquivo_entrada: str, arquivo_saida: str) -> None:
     try:
         print(f"Lendo dataset de: {arquivo_entrada}")
@@ -24,25 +46,7 @@ def preprocessar_emails_csv(arquivo_entrada: str, arquivo_saida: str) -> None:
         
         # Realizar pré-processamento
         print("Realizando pré-processamento...")
-        registros = []
-        
-        for idx, linha in df_limpo.iterrows():
-            texto = str(linha['texto']).strip()
-            label = str(linha['label']).strip()
-            
-            # Pré-processar o texto
-            texto_preprocessado = preprocessador.preprocessar(texto)
-            
-            # Adicionar apenas se houve resultado
-            if texto_preprocessado:
-                registros.append({
-                    "texto": texto,
-                    "texto_preprocessado": texto_preprocessado,
-                    "label": label
-                })
-        
-        # Criar DataFrame com o resultado
-        df_saida = pd.DataFrame(registros)
+        df_saida = preprocessar_dataframe(df_limpo, preprocessador)
         
         # Salvar o resultado
         df_saida.to_csv(arquivo_saida, index=False, encoding='utf-8')
@@ -0,0 +1,258 @@
+"""
+Representação compacta do modelo de classificação.
+
+O pipeline (TfidfVectorizer + classificador linear binário, calibrado ou
+não) é convertido em arrays numpy gravados em uma versão (subdiretório) do
+diretório do modelo:
+
+- vocabulario.npy  - termos em UTF-8, ordenados (array de bytes de largura fixa)
+- idf.npy          - idf de cada termo (float32)
+- pesos.npy        - coeficientes de cada classificador do ensemble (float32)
+- interceptos.npy  - intercepto de cada classificador
+- calibracao.npy   - parâmetros (a, b) da calibração sigmoid de cada classificador
+- meta.json        - classes, parâmetros do tokenizador, se o modelo é calibrado e
+                     hash do modelo de origem
+
+Os arrays são abertos com mmap, de modo que vários processos da API
+compartilham as mesmas páginas de memória. O vocabulário é consultado por
+busca binária (np.searchsorted) em vez de um dict de str.
+
+Arquivos mapeados nunca são regravados: cada compactação cria uma versão
+nova, completa, e só então troca de forma atômica o arquivo ATUAL, que indica
+a versão em uso. Processos em execução continuam com a versão que abriram e
+precisam ser reiniciados para usar a nova. A versão anterior é mantida para
+processos que estejam iniciando durante a troca; as mais antigas são apagadas.
+
+Uso (a partir da pasta classificadores/):
+    python modelo_compacto.py
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import List, Optional
+
+import joblib
+import numpy as np
+
+ARQUIVO_MODELO = "modelo_classificacao.pkl"
+DIRETORIO_COMPACTO = "modelo_compacto"
+ARQUIVO_VERIFICACAO = "../database/emails_processados.csv"
+# Arquivo, dentro do diretório do modelo, com o nome da versão em uso
+ARQUIVO_VERSAO = "ATUAL"
+
+
+def _sha1_arquivo(caminho: str) -> str:
+    sha1 = hashlib.sha1()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            sha1.update(bloco)
+    return sha1.hexdigest()
+
+
+def _validar_vetorizador(tfidf) -> None:
+    # Apenas a configuração que o tokenizador compacto reproduz
+    suportado = (
+        tfidf.analyzer == "word"
+        and tfidf.preprocessor is None
+        and tfidf.tokenizer is None
+        and tfidf.strip_accents is None
+        and tfidf.stop_words is None
+        and not tfidf.binary
+        and tfidf.use_idf
+        and not tfidf.sublinear_tf
+        and tfidf.norm == "l2"
+    )
+    if not suportado:
+        raise ValueError("Configuração do TfidfVectorizer não suportada pelo modelo compacto")
+
+
+def _membros_lineares(classificador):
+    """Retorna (coeficientes, intercepto, a, b) de cada classificador do ensemble"""
+    if hasattr(classificador, "calibrated_classifiers_"):
+        membros = []
+        for calibrado in classificador.calibrated_classifiers_:
+            if calibrado.method != "sigmoid":
+                raise ValueError("Apenas a calibração sigmoid é suportada pelo modelo compacto")
+            estimador = calibrado.estimator
+            calibrador = calibrado.calibrators[0]
+            membros.append((estimador.coef_[0], estimador.intercept_[0], calibrador.a_, calibrador.b_))
+        return membros
+    # Sem calibração: expit(d) equivale à sigmoid com a = -1 e b = 0
+    return [(classificador.coef_[0], classificador.intercept_[0], -1.0, 0.0)]
+
+
+def versao_atual(diretorio: str) -> Optional[str]:
+    """Caminho da versão em uso do modelo compacto, ou None se não houver"""
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_VERSAO), "r", encoding="utf-8") as arquivo:
+            versao = arquivo.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(diretorio, versao)
+
+
+def _publicar_versao(diretorio: str, temporario: str) -> str:
+    """Torna a versão gravada em `temporario` a versão em uso e apaga as antigas"""
+    anterior = versao_atual(diretorio)
+    versao = f"v{time.time_ns()}"
+    os.rename(temporario, os.path.join(diretorio, versao))
+
+    ponteiro = os.path.join(diretorio, f"{ARQUIVO_VERSAO}.{os.getpid()}.tmp")
+    with open(ponteiro, "w", encoding="utf-8") as arquivo:
+        arquivo.write(versao + "\n")
+    os.replace(ponteiro, os.path.join(diretorio, ARQUIVO_VERSAO))
+
+    manter = {versao, os.path.basename(anterior) if anterior else None}
+    for nome in os.listdir(diretorio):
+        if nome.startswith("v") and nome[1:].isdigit() and nome not in manter:
+            # Apagar não afeta processos que ainda mapeiam os arquivos (POSIX)
+            shutil.rmtree(os.path.join(diretorio, nome), ignore_errors=True)
+    return os.path.join(diretorio, versao)
+
+
+def compactar_modelo(pipeline, diretorio: str, origem_sha1: Optional[str] = None) -> str:
+    """Grava uma nova versão do modelo compacto e retorna o seu caminho"""
+    tfidf = pipeline.named_steps["tfidf"]
+    classificador = pipeline.named_steps["classificador"]
+    _validar_vetorizador(tfidf)
+    if len(classificador.classes_) != 2:
+        raise ValueError("O modelo compacto suporta apenas classificação binária")
+
+    termos = [None] * len(tfidf.vocabulary_)
+    for termo, indice in tfidf.vocabulary_.items():
+        termos[indice] = termo.encode("utf-8")
+    # Ordena pelos bytes, reordenando as colunas de idf e pesos junto
+    ordem = np.array(sorted(range(len(termos)), key=termos.__getitem__), dtype=np.int64)
+    largura = max((len(termo) for termo in termos), default=1)
+    vocabulario = np.array([termos[i] for i in ordem], dtype=f"S{largura}")
+
+    membros = _membros_lineares(classificador)
+    pesos = np.vstack([coef[ordem] for coef, _, _, _ in membros]).astype(np.float32)
+    interceptos = np.array([intercepto for _, intercepto, _, _ in membros], dtype=np.float64)
+    calibracao = np.array([(a, b) for _, _, a, b in membros], dtype=np.float64)
+
+    # Grava em um diretório novo: os arquivos da versão em uso estão mapeados
+    # pelos processos da API e não podem ser truncados
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix=".tmp_", dir=diretorio)
+    np.save(os.path.join(temporario, "vocabulario.npy"), vocabulario)
+    np.save(os.path.join(temporario, "idf.npy"), tfidf.idf_[ordem].astype(np.float32))
+    np.save(os.path.join(temporario, "pesos.npy"), pesos)
+    np.save(os.path.join(temporario, "interceptos.npy"), interceptos)
+    np.save(os.path.join(temporario, "calibracao.npy"), calibracao)
+    meta = {
+        "classes": [str(classe) for classe in classificador.classes_],
+        "ngram_range": list(tfidf.ngram_range),
+        "lowercase": bool(tfidf.lowercase),
+        "token_pattern": tfidf.token_pattern,
+        "calibrado": hasattr(classificador, "calibrated_classifiers_"),
+        "origem_sha1": origem_sha1,
+    }
+    with open(os.path.join(temporario, "meta.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(meta, arquivo, ensure_ascii=False, indent=2)
+
+    return _publicar_versao(diretorio, temporario)
+
+
+class ModeloCompacto:
+    """
+    Substituto do pipeline para inferência: expõe classes_, predict e
+    predict_proba. Todo o estado é somente leitura e pode ser compartilhado
+    entre threads e, via mmap, entre processos.
+    """
+
+    def __init__(self, diretorio: str):
+        # Aceita o diretório do modelo (usa a versão em uso) ou uma versão
+        diretorio = versao_atual(diretorio) or diretorio
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, "meta.json"), "r", encoding="utf-8") as arquivo:
+            self.meta = json.load(arquivo)
+        self.classes_ = np.array(self.meta["classes"])
+        self.ngram_range = tuple(self.meta["ngram_range"])
+        self.lowercase = self.meta["lowercase"]
+        self.calibrado = self.meta.get("calibrado", False)
+        self._token = re.compile(self.meta["token_pattern"])
+
+        carregar = lambda nome: np.load(os.path.join(diretorio, nome), mmap_mode="r")
+        self.vocabulario = carregar("vocabulario.npy")
+        self.idf = carregar("idf.npy")
+        self.pesos = carregar("pesos.npy")
+        self.interceptos = np.load(os.path.join(diretorio, "interceptos.npy"))
+        self.calibracao = np.load(os.path.join(diretorio, "calibracao.npy"))
+        self._largura = self.vocabulario.dtype.itemsize
+
+    def _termos(self, texto: str) -> List[bytes]:
+        # Mesmos n-gramas de palavras do TfidfVectorizer
+        tokens = self._token.findall(texto.lower() if self.lowercase else texto)
+        termos = []
+        minimo, maximo = self.ngram_range
+        for n in range(minimo, maximo + 1):
+            termos.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return [codificado for codificado in (termo.encode("utf-8") for termo in termos)
+                if len(codificado) <= self._largura]
+
+    def _indices(self, texto: str) -> np.ndarray:
+        termos = self._termos(texto)
+        if not termos:
+            return np.empty(0, dtype=np.int64)
+        consulta = np.array(termos, dtype=self.vocabulario.dtype)
+        posicoes = np.searchsorted(self.vocabulario, consulta)
+        validos = posicoes < len(self.vocabulario)
+        posicoes, consulta = posicoes[validos], consulta[validos]
+        # Termos fora do vocabulário caem em uma posição com outro termo
+        return posicoes[self.vocabulario[posicoes] == consulta]
+
+    def _probabilidade_positiva(self, texto: str) -> float:
+        indices, contagens = np.unique(self._indices(texto), return_counts=True)
+        if len(indices):
+            valores = contagens.astype(np.float32) * self.idf[indices]
+            valores /= np.sqrt(np.dot(valores, valores))
+            decisoes = self.pesos[:, indices] @ valores + self.interceptos
+        else:
+            decisoes = self.interceptos
+        a, b = self.calibracao[:, 0], self.calibracao[:, 1]
+        return float(np.mean(1.0 / (1.0 + np.exp(a * decisoes + b))))
+
+    def predict_proba(self, textos) -> np.ndarray:
+        positivas = np.array([self._probabilidade_positiva(texto) for texto in textos])
+        return np.column_stack([1.0 - positivas, positivas])
+
+    def predict(self, textos) -> np.ndarray:
+        return self.classes_[self.predict_proba(textos).argmax(axis=1)]
+
+
+def carregar_se_atualizado(diretorio: str, arquivo_modelo: str) -> Optional[ModeloCompacto]:
+    """Carrega o modelo compacto apenas se ele foi gerado a partir do modelo atual"""
+    versao = versao_atual(diretorio)
+    if versao is None:
+        return None
+    modelo = ModeloCompacto(versao)
+    if modelo.meta.get("origem_sha1") != _sha1_arquivo(arquivo_modelo):
+        print(f"Aviso: modelo compacto em {diretorio} está desatualizado; execute modelo_compacto.py")
+        return None
+    return modelo
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    pipeline = joblib.load(ARQUIVO_MODELO)
+    versao = compactar_modelo(pipeline, DIRETORIO_COMPACTO, _sha1_arquivo(ARQUIVO_MODELO))
+    print(f"Modelo compacto salvo em: {versao}")
+    print("Reinicie os processos da API para usar a nova versão")
+
+    # Verificar paridade com o pipeline original
+    compacto = ModeloCompacto(versao)
+    df = pd.read_csv(ARQUIVO_VERIFICACAO).dropna(subset=["texto", "texto_preprocessado"])
+    textos = df["texto"].astype(str).tolist() + df["texto_preprocessado"].astype(str).tolist()
+
+    proba_original = pipeline.predict_proba(textos)
+    proba_compacta = compacto.predict_proba(textos)
+    divergencias = int((pipeline.predict(textos) != compacto.predict(textos)).sum())
+    print(f"Textos verificados: {len(textos)}")
+    print(f"Predições divergentes: {divergencias}")
+    print(f"Maior diferença de probabilidade: {np.abs(proba_original - proba_compacta).max():.2e}")
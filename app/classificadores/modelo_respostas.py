@@ -1,58 +1,113 @@
 import re
 from typing import Dict, List, Tuple
-import spacy
-from spacy.lang.pt.stop_words import STOP_WORDS
+import numpy as np
 from datetime import datetime
 from collections import defaultdict
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.neighbors import NearestNeighbors
 
+from pre_processamento import obter_nlp, spacy_disponivel
+
+
+# Padrões compilados uma única vez e apenas lidos durante a inferência
+PADROES_TONS = {
+    "formal": re.compile(r'\b(prezado|estimado|prezadíssim|cumprimento)\b'),
+    "informal": re.compile(r'\b(oi|olá|galera|pessoal|fala)\b'),
+    "frustrado": re.compile(r'\b(frustrado|insatisfeito|desapontado|decepcionado)\b'),
+    "cortês": re.compile(r'\b(por favor|obrigado|agradeço|poderia|teria|gostaria)\b'),
+    "imperativo": re.compile(r'(?:você deve|precisa|necessário|é preciso|exijo|quero)\b'),
+}
+
+PADRAO_URGENCIA_TEMPORAL = re.compile(r'\b(hoje|agora|imediatamente|urgente|pressa|breve|ontem|há \d+ dias?)\b')
+
+
+# Regras e templates padrão; pacotes por tenant (pacotes_regras.py) podem
+# substituir qualquer uma dessas seções
+PROBLEMAS_CONHECIDOS = {
+    "acesso": {
+        "palavras": ["acesso", "permissão", "liberação", "autorização", "credenciais"],
+        "sistemas": ["confluence", "gitlab", "jira", "sharepoint", "erp", "sap"],
+        "urgencia_base": 0.6
+    },
+    "indisponibilidade": {
+        "palavras": ["fora do ar", "indisp", "parado", "travado", "congelado", "sem responder"],
+        "sistemas": ["api", "servidor", "banco dados", "sistema", "aplicação"],
+        "urgencia_base": 0.9
+    },
+    "erro_sistema": {
+        "palavras": ["erro", "bug", "falha", "exceção", "erro:", "code:", "stacktrace"],
+        "sistemas": ["sistema", "aplicação", "módulo", "integração"],
+        "urgencia_base": 0.7
+    },
+    "performance": {
+        "palavras": ["lento", "demora", "performance", "lag", "timeout", "travando"],
+        "sistemas": ["banco", "servidor", "rede", "api"],
+        "urgencia_base": 0.6
+    },
+    "dados": {
+        "palavras": ["relatório", "dados", "informação", "export", "backup", "restore"],
+        "sistemas": ["banco", "data warehouse", "bi"],
+        "urgencia_base": 0.5
+    },
+    "segurança": {
+        "palavras": ["segurança", "hack", "vazamento", "acesso indevido", "suspeito"],
+        "sistemas": ["sistema", "aplicação", "rede"],
+        "urgencia_base": 0.95
+    }
+}
+
+PADROES_PROBLEMA = {
+    r"(?:ticket|chamado|caso|protocolo)\s*#?(\d+)": "ticket_referencia",
+    r"(?:erro|erro code)\s*:?\s*(\d+|[A-Z0-9]+)": "codigo_erro",
+    r"(?:versão|v\.?)\s*([\d\.]+)": "versao_software",
+    r"(?:ambiente|env)\s*:?\s*(\w+)": "ambiente",
+    r"(?:navegador|browser)\s*:?\s*(\w+)": "navegador",
+    r"(?:sistem operacional|so|windows|linux|mac)\s*:?\s*(\w+)": "so",
+}
+
+TEMPLATES_POR_TIPO = {
+    "acesso": {
+        "alta": "Prezado(a),\n\nSua solicitação de {sistema} foi recebida e está sendo processada com MÁXIMA PRIORIDADE.\nNossa equipe de segurança e TI foi acionada para validar os requisitos necessários.\nVocê receberá a confirmação de acesso em até 1-2 dias úteis.\n\nReferência: {ticket}\n\nAtenciosamente,",
+        "média": "Olá,\n\nRecebemos sua requisição de {sistema}. Estamos validando as permissões necessárias com a equipe responsável.\nVocê receberá nosso retorno em até 2-3 dias úteis.\n\nReferência: {ticket}\n\nCordialmente,",
+        "baixa": "Prezado(a),\n\nSua solicitação foi recebida e registrada em nosso sistema.\nProcessaremos conforme a ordem de prioridades e você será contatado em breve.\n\nReferência: {ticket}\n\nAtenciosamente,"
+    },
+    "indisponibilidade": {
+        "alta": "Prezadíssimo(a), CRÍTICO: Identificamos que {sistema} está {status}.\n\nNossa equipe técnica ACABA DE SER ACIONADA para investigação imediata.\nEste é um incidente crítico e estamos trabalhando para restauração urgente.\n\nAtualizaremos você a cada 30 minutos.\n\nReferência: {ticket}\n\nMelhores cumprimentos,",
+        "média": "Prezado(a),\n\nIdentificamos que {sistema} não está respondendo adequadamente.\nNossa equipe técnica está investigando o problema e trabalhando na restauração.\n\nEstaremos em contato em breve com atualizações.\n\nReferência: {ticket}\n\nAtenciosamente,",
+        "baixa": "Olá,\n\nRecebemos o relato de indisponibilidade em {sistema}.\nEstamos investigando e retornaremos com informações em breve.\n\nReferência: {ticket}\n\nCordialmente,"
+    },
+    "erro_sistema": {
+        "alta": "Prezado(a),\n\nIdentificamos o erro {codigo_erro} em {sistema}.\n\nNossa equipe de desenvolvimento foi acionada. Este é um problema crítico e estamos trabalhando na solução urgente.\nEsperamos resolver em {prazo}.\n\nReferência: {ticket}\nAmbiente: {ambiente}\n\nAtenciosamente,",
+        "média": "Olá,\n\nRecebemos o relato do erro em {sistema}. Nossa equipe técnica está analisando a causa raiz.\nTrabalhamos para resolver o mais breve possível.\n\nReferência: {ticket}\n\nCordialmente,",
+        "baixa": "Prezado(a),\n\nObrigado por reportar o erro. Estamos investigando e retornaremos com um diagnóstico em breve.\n\nReferência: {ticket}\n\nAtenciosamente,"
+    },
+    "performance": {
+        "alta": "Prezado(a),\n\nIdentificamos problemas de performance em {sistema}.\nNossa equipe de infraestrutura está investigando possíveis gargalos.\nPriorizaremos a solução e retornaremos em breve.\n\nReferência: {ticket}\n\nAtenciosamente,",
+        "média": "Olá,\n\nRecebemos seu relato sobre a lentidão em {sistema}.\nEstamos analisando a performance e possíveis causas.\n\nReferência: {ticket}\n\nCordialmente,",
+        "baixa": "Prezado(a),\n\nObrigado pelo feedback sobre performance.\nIremos investigar e otimizar quando possível.\n\nReferência: {ticket}\n\nAtenciosamente,"
+    },
+    "dados": {
+        "alta": "Prezado(a),\n\nRecebemos sua solicitação de dados com urgência.\nNossa equipe de analytics está preparando o relatório/export solicitado.\nEntrega prevista: {prazo}.\n\nReferência: {ticket}\n\nAtenciosamente,",
+        "média": "Olá,\n\nSua solicitação de dados foi recebida.\nEstamos compilando as informações necessárias e enviaremos em breve.\n\nReferência: {ticket}\n\nCordialmente,",
+        "baixa": "Prezado(a),\n\nRecebemos sua solicitação de dados.\nEntraremos em contato com as informações solicitadas.\n\nReferência: {ticket}\n\nAtenciosamente,"
+    },
+    "segurança": {
+        "alta": "CRÍTICO - SEGURANÇA DA INFORMAÇÃO\n\nPrezadíssimo(a),\n\nIdentificamos uma possível ameaça à segurança conforme relatado.\nNossa equipe de segurança foi IMEDIATAMENTE ACIONADA para investigação e contenção.\n\nTrabalhamos com máxima urgência para remediar qualquer vulnerabilidade.\nEntre em contato conosco por telefone para detalhes sensíveis.\n\nReferência: {ticket}\n\nMelhores cumprimentos,",
+        "média": "Prezado(a),\n\nObrigado por relatar a questão de segurança.\nNossa equipe de segurança está investigando com prioridade.\n\nReferência: {ticket}\n\nAtenciosamente,",
+        "baixa": "Prezado(a),\n\nRecebemos sua comunicação sobre segurança.\nInvestigaremos conforme o protocolo de segurança da informação.\n\nReferência: {ticket}\n\nCordialmente,"
+    }
+}
+
 
 class AnalisadorContexto:
     
-    def __init__(self):
-        self.problemas_conhecidos = {
-            "acesso": {
-                "palavras": ["acesso", "permissão", "liberação", "autorização", "credenciais"],
-                "sistemas": ["confluence", "gitlab", "jira", "sharepoint", "erp", "sap"],
-                "urgencia_base": 0.6
-            },
-            "indisponibilidade": {
-                "palavras": ["fora do ar", "indisp", "parado", "travado", "congelado", "sem responder"],
-                "sistemas": ["api", "servidor", "banco dados", "sistema", "aplicação"],
-                "urgencia_base": 0.9
-            },
-            "erro_sistema": {
-                "palavras": ["erro", "bug", "falha", "exceção", "erro:", "code:", "stacktrace"],
-                "sistemas": ["sistema", "aplicação", "módulo", "integração"],
-                "urgencia_base": 0.7
-            },
-            "performance": {
-                "palavras": ["lento", "demora", "performance", "lag", "timeout", "travando"],
-                "sistemas": ["banco", "servidor", "rede", "api"],
-                "urgencia_base": 0.6
-            },
-            "dados": {
-                "palavras": ["relatório", "dados", "informação", "export", "backup", "restore"],
-                "sistemas": ["banco", "data warehouse", "bi"],
-                "urgencia_base": 0.5
-            },
-            "segurança": {
-                "palavras": ["segurança", "hack", "vazamento", "acesso indevido", "suspeito"],
-                "sistemas": ["sistema", "aplicação", "rede"],
-                "urgencia_base": 0.95
-            }
-        }
-        
-        
-        self.padroes_problema = {
-            r"(?:ticket|chamado|caso|protocolo)\s*#?(\d+)": "ticket_referencia",
-            r"(?:erro|erro code)\s*:?\s*(\d+|[A-Z0-9]+)": "codigo_erro",
-            r"(?:versão|v\.?)\s*([\d\.]+)": "versao_software",
-            r"(?:ambiente|env)\s*:?\s*(\w+)": "ambiente",
-            r"(?:navegador|browser)\s*:?\s*(\w+)": "navegador",
-            r"(?:sistem operacional|so|windows|linux|mac)\s*:?\s*(\w+)": "so",
-        }
+    def __init__(self, problemas_conhecidos: Dict = None, padroes_problema: Dict = None):
+        self.problemas_conhecidos = problemas_conhecidos if problemas_conhecidos is not None else PROBLEMAS_CONHECIDOS
+        self.padroes_problema = padroes_problema if padroes_problema is not None else PADROES_PROBLEMA
+        self._padroes_compilados = tuple(
+            (re.compile(padrao, re.IGNORECASE), categoria)
+            for padrao, categoria in self.padroes_problema.items()
+        )
     
     def analisar_tipo_problema(self, texto: str) -> Dict:
         texto_lower = texto.lower()
@@ -96,8 +151,8 @@ class AnalisadorContexto:
             "sistema_operacional": []
         }
         
-        for padrao, categoria in self.padroes_problema.items():
-            matches = re.findall(padrao, texto, re.IGNORECASE)
+        for padrao, categoria in self._padroes_compilados:
+            matches = padrao.findall(texto)
             if matches:
                 if categoria == "ticket_referencia":
                     info_tecnica["ticket_numero"] = matches
@@ -118,11 +173,8 @@ class AnalisadorContexto:
         texto_lower = texto.lower()
         
         tons = {
-            "formal": len(re.findall(r'\b(prezado|estimado|prezadíssim|cumprimento)\b', texto_lower)),
-            "informal": len(re.findall(r'\b(oi|olá|galera|pessoal|fala)\b', texto_lower)),
-            "frustrado": len(re.findall(r'\b(frustrado|insatisfeito|desapontado|decepcionado)\b', texto_lower)),
-            "cortês": len(re.findall(r'\b(por favor|obrigado|agradeço|poderia|teria|gostaria)\b', texto_lower)),
-            "imperativo": len(re.findall(r'(?:você deve|precisa|necessário|é preciso|exijo|quero)\b', texto_lower)),
+            tom: len(padrao.findall(texto_lower))
+            for tom, padrao in PADROES_TONS.items()
         }
         
         tom_principal = max(tons, key=tons.get)
@@ -143,7 +195,7 @@ class AnalisadorContexto:
         }
         
         
-        urgentes = re.findall(r'\b(hoje|agora|imediatamente|urgente|pressa|breve|ontem|há \d+ dias?)\b', texto_lower)
+        urgentes = PADRAO_URGENCIA_TEMPORAL.findall(texto_lower)
         if urgentes:
             contexto_temporal["referencias_tempo"] = urgentes
             contexto_temporal["urgencia_temporal"] = min(1.0, len(urgentes) * 0.3)
@@ -157,55 +209,38 @@ class AnalisadorContexto:
 
 class GeradorRespostas:
     
-    def __init__(self):
-        try:
-            self.nlp = spacy.load("pt_core_news_sm")
-        except:
+    """
+    Gera respostas a partir do texto do email.
+
+    Todo o estado é montado no __init__ e apenas lido depois, de modo que uma
+    mesma instância pode ser compartilhada entre threads. O spaCy é a exceção:
+    cada thread recebe o seu próprio objeto Language (ver `nlp`), carregado
+    apenas no primeiro acesso.
+    """
+    
+    def __init__(self, problemas_conhecidos: Dict = None, padroes_problema: Dict = None,
+                 templates_por_tipo: Dict = None):
+        # Apenas verifica a instalação; o modelo não é usado na inferência
+        self._spacy_disponivel = spacy_disponivel()
+        if not self._spacy_disponivel:
             print("Aviso: Modelo spacy não carregado.")
-            self.nlp = None
-        
-        self.analisador = AnalisadorContexto()
-        
-        self._tfidf = TfidfVectorizer(ngram_range=(1, 2), min_df=1)
-        self._nn = NearestNeighbors(n_neighbors=1, metric="cosine")
-        self._labels_tfidf: List[str] = []
-        self._treinar_sugeridor_tipos()
-        
-        
-        self.templates_por_tipo = {
-            "acesso": {
-                "alta": "Prezado(a),\n\nSua solicitação de {sistema} foi recebida e está sendo processada com MÁXIMA PRIORIDADE.\nNossa equipe de segurança e TI foi acionada para validar os requisitos necessários.\nVocê receberá a confirmação de acesso em até 1-2 dias úteis.\n\nReferência: {ticket}\n\nAtenciosamente,",
-                "média": "Olá,\n\nRecebemos sua requisição de {sistema}. Estamos validando as permissões necessárias com a equipe responsável.\nVocê receberá nosso retorno em até 2-3 dias úteis.\n\nReferência: {ticket}\n\nCordialmente,",
-                "baixa": "Prezado(a),\n\nSua solicitação foi recebida e registrada em nosso sistema.\nProcessaremos conforme a ordem de prioridades e você será contatado em breve.\n\nReferência: {ticket}\n\nAtenciosamente,"
-            },
-            "indisponibilidade": {
-                "alta": "Prezadíssimo(a), CRÍTICO: Identificamos que {sistema} está {status}.\n\nNossa equipe técnica ACABA DE SER ACIONADA para investigação imediata.\nEste é um incidente crítico e estamos trabalhando para restauração urgente.\n\nAtualizaremos você a cada 30 minutos.\n\nReferência: {ticket}\n\nMelhores cumprimentos,",
-                "média": "Prezado(a),\n\nIdentificamos que {sistema} não está respondendo adequadamente.\nNossa equipe técnica está investigando o problema e trabalhando na restauração.\n\nEstaremos em contato em breve com atualizações.\n\nReferência: {ticket}\n\nAtenciosamente,",
-                "baixa": "Olá,\n\nRecebemos o relato de indisponibilidade em {sistema}.\nEstamos investigando e retornaremos com informações em breve.\n\nReferência: {ticket}\n\nCordialmente,"
-            },
-            "erro_sistema": {
-                "alta": "Prezado(a),\n\nIdentificamos o erro {codigo_erro} em {sistema}.\n\nNossa equipe de desenvolvimento foi acionada. Este é um problema crítico e estamos trabalhando na solução urgente.\nEsperamos resolver em {prazo}.\n\nReferência: {ticket}\nAmbiente: {ambiente}\n\nAtenciosamente,",
-                "média": "Olá,\n\nRecebemos o relato do erro em {sistema}. Nossa equipe técnica está analisando a causa raiz.\nTrabalhamos para resolver o mais breve possível.\n\nReferência: {ticket}\n\nCordialmente,",
-                "baixa": "Prezado(a),\n\nObrigado por reportar o erro. Estamos investigando e retornaremos com um diagnóstico em breve.\n\nReferência: {ticket}\n\nAtenciosamente,"
-            },
-            "performance": {
-                "alta": "Prezado(a),\n\nIdentificamos problemas de performance em {sistema}.\nNossa equipe de infraestrutura está investigando possíveis gargalos.\nPriorizaremos a solução e retornaremos em breve.\n\nReferência: {ticket}\n\nAtenciosamente,",
-                "média": "Olá,\n\nRecebemos seu relato sobre a lentidão em {sistema}.\nEstamos analisando a performance e possíveis causas.\n\nReferência: {ticket}\n\nCordialmente,",
-                "baixa": "Prezado(a),\n\nObrigado pelo feedback sobre performance.\nIremos investigar e otimizar quando possível.\n\nReferência: {ticket}\n\nAtenciosamente,"
-            },
-            "dados": {
-                "alta": "Prezado(a),\n\nRecebemos sua solicitação de dados com urgência.\nNossa equipe de analytics está preparando o relatório/export solicitado.\nEntrega prevista: {prazo}.\n\nReferência: {ticket}\n\nAtenciosamente,",
-                "média": "Olá,\n\nSua solicitação de dados foi recebida.\nEstamos compilando as informações necessárias e enviaremos em breve.\n\nReferência: {ticket}\n\nCordialmente,",
-                "baixa": "Prezado(a),\n\nRecebemos sua solicitação de dados.\nEntraremos em contato com as informações solicitadas.\n\nReferência: {ticket}\n\nAtenciosamente,"
-            },
-            "segurança": {
-                "alta": "CRÍTICO - SEGURANÇA DA INFORMAÇÃO\n\nPrezadíssimo(a),\n\nIdentificamos uma possível ameaça à segurança conforme relatado.\nNossa equipe de segurança foi IMEDIATAMENTE ACIONADA para investigação e contenção.\n\nTrabalhamos com máxima urgência para remediar qualquer vulnerabilidade.\nEntre em contato conosco por telefone para detalhes sensíveis.\n\nReferência: {ticket}\n\nMelhores cumprimentos,",
-                "média": "Prezado(a),\n\nObrigado por relatar a questão de segurança.\nNossa equipe de segurança está investigando com prioridade.\n\nReferência: {ticket}\n\nAtenciosamente,",
-                "baixa": "Prezado(a),\n\nRecebemos sua comunicação sobre segurança.\nInvestigaremos conforme o protocolo de segurança da informação.\n\nReferência: {ticket}\n\nCordialmente,"
-            }
-        }
+        
+        self.analisador = AnalisadorContexto(problemas_conhecidos, padroes_problema)
+        
+        self._tfidf, self._nn, self._labels_tfidf = self._treinar_sugeridor_tipos()
+        
+        self.templates_por_tipo = templates_por_tipo if templates_por_tipo is not None else TEMPLATES_POR_TIPO
+    
+    @property
+    def nlp(self):
+        if not self._spacy_disponivel:
+            return None
+        return obter_nlp()
     
-    def _treinar_sugeridor_tipos(self) -> None:
+    def _treinar_sugeridor_tipos(self) -> Tuple[TfidfVectorizer, NearestNeighbors, Tuple[str, ...]]:
+        # Ajusta em variáveis locais e só publica os objetos já treinados
+        tfidf = TfidfVectorizer(ngram_range=(1, 2), min_df=1, dtype=np.float32)
+        nn = NearestNeighbors(n_neighbors=1, metric="cosine")
         corpus = []
         labels = []
         for tipo, cfg in self.analisador.problemas_conhecidos.items():
@@ -213,10 +248,10 @@ class GeradorRespostas:
             corpus.append(texto_base)
             labels.append(tipo)
         if not corpus:
-            return
-        X = self._tfidf.fit_transform(corpus)
-        self._nn.fit(X)
-        self._labels_tfidf = labels
+            return tfidf, nn, ()
+        X = tfidf.fit_transform(corpus)
+        nn.fit(X)
+        return tfidf, nn, tuple(labels)
 
     def calculo_similaridade(self, texto: str) -> Tuple[str, float]:
         if not texto.strip():
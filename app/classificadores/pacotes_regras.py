@@ -0,0 +1,138 @@
+"""
+Pacotes de regras e templates por tenant (unidade de negócio).
+
+Cada pacote é um arquivo JSON em DIRETORIO_PACOTES/<tenant>.json com as
+seções opcionais abaixo; seções ausentes usam os padrões de
+modelo_respostas.py:
+
+- "problemas_conhecidos": {tipo: {"palavras": [...], "sistemas": [...], "urgencia_base": 0.5}}
+- "padroes_problema": {regex: categoria}  (regex com exatamente um grupo de captura)
+- "templates_por_tipo": {tipo: {"alta": "...", "média": "...", "baixa": "..."}}
+
+Um pacote é compilado uma única vez em um GeradorRespostas próprio (regexes
+compiladas, sugeridor de tipos treinado e templates) e mantido em um cache
+LRU com uma entrada por arquivo: um pacote editado é recompilado e substitui
+a versão anterior. O modelo de classificação continua único e compartilhado
+pela API.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from modelo_respostas import GeradorRespostas
+
+DIRETORIO_PACOTES = "pacotes"
+MAX_PACOTES_COMPILADOS = 32
+
+SECOES = ("problemas_conhecidos", "padroes_problema", "templates_por_tipo")
+CATEGORIAS_PADROES = {"ticket_referencia", "codigo_erro", "versao_software", "ambiente", "navegador", "so"}
+
+_NOME_TENANT = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# caminho -> (data de modificação, GeradorRespostas), do menos ao mais recente
+_pacotes_compilados: "OrderedDict[str, Tuple[int, GeradorRespostas]]" = OrderedDict()
+_trava_pacotes = threading.Lock()
+
+
+class TenantDesconhecido(LookupError):
+    pass
+
+
+def verificar_tenant(tenant: str, diretorio: str = DIRETORIO_PACOTES) -> str:
+    """Retorna o caminho do pacote do tenant, sem compilá-lo"""
+    if not isinstance(tenant, str) or not _NOME_TENANT.match(tenant):
+        raise TenantDesconhecido(f"Nome de tenant inválido: {tenant!r}")
+
+    caminho = os.path.join(diretorio, f"{tenant}.json")
+    if not os.path.isfile(caminho):
+        raise TenantDesconhecido(f"Tenant desconhecido: {tenant}")
+    return caminho
+
+
+def obter_gerador(tenant: str, diretorio: str = DIRETORIO_PACOTES) -> GeradorRespostas:
+    """Retorna o GeradorRespostas compilado do tenant, usando o cache LRU"""
+    caminho = verificar_tenant(tenant, diretorio)
+    try:
+        modificado = os.stat(caminho).st_mtime_ns
+    except FileNotFoundError:
+        raise TenantDesconhecido(f"Tenant desconhecido: {tenant}")
+
+    with _trava_pacotes:
+        entrada = _pacotes_compilados.get(caminho)
+        if entrada is not None and entrada[0] == modificado:
+            _pacotes_compilados.move_to_end(caminho)
+            return entrada[1]
+
+    # Compilado fora da trava para não bloquear os demais tenants
+    gerador = _compilar_pacote(caminho)
+    with _trava_pacotes:
+        # Um pacote editado substitui a versão anterior na mesma entrada
+        _pacotes_compilados[caminho] = (modificado, gerador)
+        _pacotes_compilados.move_to_end(caminho)
+        while len(_pacotes_compilados) > MAX_PACOTES_COMPILADOS:
+            _pacotes_compilados.popitem(last=False)
+    return gerador
+
+
+def pacotes_em_cache() -> int:
+    return len(_pacotes_compilados)
+
+
+def _compilar_pacote(caminho: str) -> GeradorRespostas:
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        pacote = json.load(arquivo)
+    validar_pacote(pacote)
+    print(f"Pacote de regras compilado: {caminho}")
+    return GeradorRespostas(**{secao: pacote[secao] for secao in SECOES if secao in pacote})
+
+
+def validar_pacote(pacote: Dict) -> None:
+    """Levanta ValueError se o pacote não tiver o formato esperado"""
+    if not isinstance(pacote, dict):
+        raise ValueError("O pacote deve ser um objeto JSON")
+
+    desconhecidas = set(pacote) - set(SECOES)
+    if desconhecidas:
+        raise ValueError(f"Seções desconhecidas no pacote: {sorted(desconhecidas)}")
+    for secao in SECOES:
+        if not isinstance(pacote.get(secao, {}), dict):
+            raise ValueError(f"A seção '{secao}' deve ser um objeto JSON")
+
+    for tipo, config in pacote.get("problemas_conhecidos", {}).items():
+        if not isinstance(config, dict):
+            raise ValueError(f"Problema '{tipo}' deve ser um objeto JSON")
+        palavras = config.get("palavras")
+        if not isinstance(palavras, list) or not all(isinstance(p, str) and p for p in palavras):
+            raise ValueError(f"Problema '{tipo}' precisa de 'palavras' (lista de textos não vazios)")
+        # O texto do email é convertido para minúsculas antes da comparação
+        maiusculas = [palavra for palavra in palavras if palavra != palavra.lower()]
+        if maiusculas:
+            raise ValueError(f"Problema '{tipo}': palavras devem estar em minúsculas: {maiusculas}")
+        sistemas = config.get("sistemas", [])
+        if not isinstance(sistemas, list) or not all(isinstance(s, str) for s in sistemas):
+            raise ValueError(f"Problema '{tipo}': 'sistemas' deve ser uma lista de textos")
+        urgencia = config.get("urgencia_base")
+        if isinstance(urgencia, bool) or not isinstance(urgencia, (int, float)):
+            raise ValueError(f"Problema '{tipo}' precisa de 'urgencia_base' numérica")
+
+    for padrao, categoria in pacote.get("padroes_problema", {}).items():
+        if not isinstance(categoria, str) or categoria not in CATEGORIAS_PADROES:
+            raise ValueError(f"Categoria de padrão desconhecida: {categoria}")
+        try:
+            compilado = re.compile(padrao)
+        except re.error as e:
+            raise ValueError(f"Regex inválida '{padrao}': {e}")
+        # findall() devolve o grupo capturado, usado diretamente nas respostas
+        if compilado.groups != 1:
+            raise ValueError(f"Regex '{padrao}' deve ter exatamente um grupo de captura "
+                             f"(tem {compilado.groups}); use (?:...) para os demais")
+
+    for tipo, templates in pacote.get("templates_por_tipo", {}).items():
+        # 'baixa' é o nível usado quando o nível pedido não existe
+        if not isinstance(templates, dict) or "baixa" not in templates:
+            raise ValueError(f"Templates de '{tipo}' precisam ao menos do nível 'baixa'")
+        if not all(isinstance(template, str) for template in templates.values()):
+            raise ValueError(f"Templates de '{tipo}' devem ser textos")
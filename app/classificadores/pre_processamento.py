@@ -1,5 +1,7 @@
 import re
+import threading
 import unicodedata
+from functools import lru_cache
 from typing import List
 import pandas as pd
 
@@ -7,10 +9,37 @@ import spacy
 from spacy.lang.pt.stop_words import STOP_WORDS
 
 
+MODELO_SPACY = "pt_core_news_sm"
+
+# Cada thread mantém seu próprio objeto Language do spaCy
+_spacy_por_thread = threading.local()
+
+RE_EMAIL = re.compile(r"\b[\w\.-]+@[\w\.-]+\.\w+\b")
+RE_URL = re.compile(r"http\S+|www\S+|https\S+", re.MULTILINE)
+RE_NUMERO = re.compile(r"\d+")
+RE_PONTUACAO = re.compile(r"[^\w\s]")
+
+
+def obter_nlp(modelo: str = MODELO_SPACY):
+    """Retorna o modelo spaCy exclusivo da thread atual, carregando-o se necessário"""
+    modelos = getattr(_spacy_por_thread, "modelos", None)
+    if modelos is None:
+        modelos = _spacy_por_thread.modelos = {}
+    if modelo not in modelos:
+        modelos[modelo] = spacy.load(modelo)
+    return modelos[modelo]
+
+
+@lru_cache(maxsize=None)
+def spacy_disponivel(modelo: str = MODELO_SPACY) -> bool:
+    """Indica se o modelo spaCy está instalado, sem carregá-lo"""
+    return spacy.util.is_package(modelo)
+
+
 class PreProcessadorEmail:
     def __init__(self):
-        # Carregar modelo spacy para português
-        self.nlp = spacy.load("pt_core_news_sm")
+        # Carregar modelo spacy para português (falha cedo se não instalado)
+        obter_nlp()
         
         # Stopwords customizadas (comuns em corpos de email)
         self.stopwords_email = {
@@ -34,22 +63,27 @@ class PreProcessadorEmail:
             "prezado",
         }
 
-        self.stopwords = STOP_WORDS.union(self.stopwords_email)
+        self.stopwords = frozenset(STOP_WORDS.union(self.stopwords_email))
+
+    @property
+    def nlp(self):
+        # O pipeline do spaCy não é seguro entre threads: cada uma usa o seu
+        return obter_nlp()
 
     
     def preprocessar(self, texto: str) -> str:
         # Remover emails
-        texto = re.sub(r"\b[\w\.-]+@[\w\.-]+\.\w+\b", " ", texto)
+        texto = RE_EMAIL.sub(" ", texto)
         # Remover URLs
-        texto = re.sub(r"http\S+|www\S+|https\S+", " ", texto, flags=re.MULTILINE)
+        texto = RE_URL.sub(" ", texto)
         # Remover números
-        texto = re.sub(r"\d+", " ", texto)
+        texto = RE_NUMERO.sub(" ", texto)
         # Remover caracteres especiais e normalizar
         texto = texto.lower()
         texto = unicodedata.normalize("NFKD", texto)
         texto = texto.encode("ascii", "ignore").decode("utf-8")
         # Remover pontuação e outros caracteres especiais
-        texto = re.sub(r"[^\w\s]", " ", texto)
+        texto = RE_PONTUACAO.sub(" ", texto)
 
         # Processar com Spacy
         doc = self.nlp(texto)
@@ -0,0 +1,476 @@
+"""
+Pré-processamento e treinamento em shards, coordenados apenas por um
+diretório compartilhado (ex.: NFS). Não depende de nenhum serviço externo.
+
+Etapas:
+1. dividir  - o CSV de entrada é dividido em shards em <diretorio>/shards
+2. worker   - cada processo/nó reserva shards livres (arquivo .lock criado
+              de forma exclusiva), pré-processa e grava o resultado junto com
+              as contagens parciais de vocabulário e frequência de documentos
+3. treinar  - as contagens são mescladas no vocabulário global do
+              TfidfVectorizer e o classificador é ajustado em blocos; as
+              probabilidades são calibradas (Platt) em parte dos emails
+              reservados, como no treinamento em memória
+
+Uso (a partir da pasta classificadores/):
+    python treinamento_distribuido.py dividir --shards 16
+    python treinamento_distribuido.py worker            # em cada nó
+    python treinamento_distribuido.py treinar
+
+    # ou tudo em uma máquina, com processos locais no lugar dos nós:
+    python treinamento_distribuido.py local --shards 16 --workers 4
+
+Reservas (shards/shard_XXXX.lock):
+- o worker atualiza a data de modificação do lock a cada INTERVALO_HEARTBEAT
+  segundos enquanto processa o shard e apaga o lock se o processamento falhar
+- um lock sem atualização há mais de LOCK_EXPIRA segundos (worker morto ou nó
+  fora do ar) é considerado abandonado e o shard é retomado por outro worker
+- para liberar um shard manualmente, apague o lock e inicie um worker:
+      rm ../database/distribuido/shards/shard_0003.lock
+- treinar espera no máximo --tempo-limite segundos pelos shards pendentes
+"""
+import argparse
+import glob
+import os
+import shutil
+import socket
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from multiprocessing import Process
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.pipeline import Pipeline
+
+from base_de_dados import preprocessar_dataframe
+from pre_processamento import PreProcessadorEmail
+from treinamento_modelo import PARAMETROS_CALIBRACAO, PARAMETROS_TFIDF
+
+# FrozenEstimator substitui cv="prefit" a partir do scikit-learn 1.6
+try:
+    from sklearn.frozen import FrozenEstimator
+except ImportError:
+    FrozenEstimator = None
+
+ARQUIVO_ENTRADA = "../database/emails_produtivos_improdutivos.csv"
+DIRETORIO_TRABALHO = "../database/distribuido"
+ARQUIVO_MODELO = "modelo_classificacao.pkl"
+
+NUM_SHARDS = 8
+TAMANHO_BLOCO = 5000
+NUM_EPOCAS = 5
+# Percentual de emails reservados para teste, escolhidos pelo hash do texto
+PERCENTUAL_TESTE = 20
+# Dos emails reservados, os com hash abaixo deste percentual calibram as
+# probabilidades e os demais avaliam o modelo
+PERCENTUAL_CALIBRACAO = 10
+MAX_EMAILS_CALIBRACAO = 50000
+INTERVALO_ESPERA = 2
+INTERVALO_HEARTBEAT = 30
+LOCK_EXPIRA = 10 * 60
+TEMPO_LIMITE_ESPERA = 60 * 60
+
+
+def _caminhos(diretorio: str) -> Dict[str, str]:
+    return {
+        "shards": os.path.join(diretorio, "shards"),
+        "processados": os.path.join(diretorio, "processados"),
+        "contagens": os.path.join(diretorio, "contagens"),
+    }
+
+
+def _nome_shard(caminho: str) -> str:
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def _gravar_atomico(caminho: str, gravar) -> None:
+    # Outros nós só enxergam o arquivo depois de completamente escrito
+    temporario = f"{caminho}.{socket.gethostname()}.{os.getpid()}.tmp"
+    gravar(temporario)
+    os.replace(temporario, caminho)
+
+
+def eh_teste(texto: str) -> bool:
+    """Separação treino/teste determinística, igual em qualquer nó"""
+    return zlib.crc32(texto.encode("utf-8")) % 100 < PERCENTUAL_TESTE
+
+
+def eh_calibracao(texto: str) -> bool:
+    return zlib.crc32(texto.encode("utf-8")) % 100 < PERCENTUAL_CALIBRACAO
+
+
+def dividir_em_shards(arquivo_entrada: str, diretorio: str, num_shards: int = NUM_SHARDS) -> None:
+    """Divide o CSV em shards, lendo-o em blocos para não carregá-lo inteiro"""
+    caminhos = _caminhos(diretorio)
+    if os.path.exists(caminhos["shards"]):
+        raise FileExistsError(f"Shards já existem em {caminhos['shards']}")
+
+    temporario = caminhos["shards"] + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    total = 0
+    for bloco in pd.read_csv(arquivo_entrada, encoding='utf-8', chunksize=TAMANHO_BLOCO):
+        bloco = bloco.dropna(subset=['texto', 'label'])[['texto', 'label']]
+        # Linhas distribuídas em rodízio para que cada shard tenha todos os rótulos
+        indices_shard = (np.arange(total, total + len(bloco))) % num_shards
+        total += len(bloco)
+        for indice, parte in bloco.groupby(indices_shard):
+            arquivo = os.path.join(temporario, f"shard_{indice:04d}.csv")
+            parte.to_csv(arquivo, mode='a', header=not os.path.exists(arquivo), index=False, encoding='utf-8')
+
+    # Publica os shards de uma só vez para os workers
+    os.makedirs(diretorio, exist_ok=True)
+    os.rename(temporario, caminhos["shards"])
+    print(f"{total} emails divididos em {len(os.listdir(caminhos['shards']))} shards em {caminhos['shards']}")
+
+
+def _caminho_lock(arquivo_shard: str) -> str:
+    return os.path.splitext(arquivo_shard)[0] + ".lock"
+
+
+def _lock_expirado(caminho_lock: str) -> bool:
+    try:
+        return time.time() - os.stat(caminho_lock).st_mtime > LOCK_EXPIRA
+    except FileNotFoundError:
+        return False
+
+
+def _liberar_lock_expirado(caminho_lock: str) -> None:
+    """Remove um lock abandonado, sem apagar o de um worker que acabou de reservá-lo"""
+    # Renomear é atômico: só um worker retira o lock do caminho
+    descartado = f"{caminho_lock}.{socket.gethostname()}.{os.getpid()}.expirado"
+    try:
+        os.rename(caminho_lock, descartado)
+    except FileNotFoundError:
+        return
+    if not _lock_expirado(descartado):
+        # Outro worker recriou o lock entre a verificação e o rename: devolve
+        os.rename(descartado, caminho_lock)
+        return
+    os.remove(descartado)
+    print(f"Lock expirado removido: {caminho_lock}")
+
+
+def _reservar_shard(diretorio: str) -> Optional[str]:
+    caminhos = _caminhos(diretorio)
+    for arquivo in sorted(glob.glob(os.path.join(caminhos["shards"], "shard_*.csv"))):
+        nome = _nome_shard(arquivo)
+        if os.path.exists(os.path.join(caminhos["contagens"], f"{nome}.pkl")):
+            continue
+        caminho_lock = _caminho_lock(arquivo)
+        if _lock_expirado(caminho_lock):
+            _liberar_lock_expirado(caminho_lock)
+        try:
+            # O_EXCL garante que apenas um worker reserve cada shard
+            descritor = os.open(caminho_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        with os.fdopen(descritor, "w") as lock:
+            lock.write(f"{socket.gethostname()}:{os.getpid()}\n")
+        return arquivo
+    return None
+
+
+@contextmanager
+def _manter_lock(caminho_lock: str):
+    """
+    Atualiza a data de modificação do lock enquanto o shard é processado e
+    apaga o lock se o processamento falhar, liberando o shard para outro worker
+    """
+    parar = threading.Event()
+
+    def heartbeat():
+        while not parar.wait(INTERVALO_HEARTBEAT):
+            try:
+                os.utime(caminho_lock)
+            except FileNotFoundError:
+                return
+
+    thread = threading.Thread(target=heartbeat, daemon=True)
+    thread.start()
+    try:
+        yield
+    except BaseException:
+        parar.set()
+        thread.join()
+        try:
+            os.remove(caminho_lock)
+        except FileNotFoundError:
+            pass
+        raise
+    parar.set()
+    thread.join()
+
+
+def contar_termos(textos: pd.Series) -> Dict:
+    """Frequência de documentos e frequência total de cada termo do shard"""
+    if textos.empty:
+        return {"df": {}, "tf": {}}
+
+    contador = CountVectorizer(ngram_range=PARAMETROS_TFIDF["ngram_range"])
+    try:
+        X = contador.fit_transform(textos)
+    except ValueError:
+        # Nenhum termo no shard
+        return {"df": {}, "tf": {}}
+
+    termos = contador.get_feature_names_out().tolist()
+    frequencia_documentos = np.bincount(X.indices, minlength=X.shape[1])
+    frequencia_total = np.asarray(X.sum(axis=0)).ravel()
+    return {
+        "df": dict(zip(termos, frequencia_documentos.tolist())),
+        "tf": dict(zip(termos, frequencia_total.tolist())),
+    }
+
+
+def processar_shard(diretorio: str, arquivo_shard: str, preprocessador: PreProcessadorEmail) -> None:
+    caminhos = _caminhos(diretorio)
+    nome = _nome_shard(arquivo_shard)
+
+    df = pd.read_csv(arquivo_shard, encoding='utf-8')
+    df_saida = preprocessar_dataframe(df, preprocessador)
+    df_saida["teste"] = df_saida["texto"].map(eh_teste)
+    # Embaralha para que os blocos do treinamento misturem os rótulos
+    df_saida = df_saida.sample(frac=1, random_state=zlib.crc32(nome.encode())).reset_index(drop=True)
+
+    treino = df_saida[~df_saida["teste"]]
+    contagens = contar_termos(treino["texto_preprocessado"])
+    contagens["documentos"] = len(treino)
+    contagens["labels"] = treino["label"].value_counts().to_dict()
+
+    _gravar_atomico(
+        os.path.join(caminhos["processados"], f"{nome}.csv"),
+        lambda caminho: df_saida.to_csv(caminho, index=False, encoding='utf-8')
+    )
+    # As contagens são gravadas por último e marcam o shard como concluído
+    _gravar_atomico(
+        os.path.join(caminhos["contagens"], f"{nome}.pkl"),
+        lambda caminho: joblib.dump(contagens, caminho)
+    )
+    print(f"[{socket.gethostname()}:{os.getpid()}] {nome}: {len(df_saida)} emails processados")
+
+
+def executar_worker(diretorio: str) -> None:
+    """Processa shards livres até não restar nenhum"""
+    caminhos = _caminhos(diretorio)
+    while not os.path.isdir(caminhos["shards"]):
+        print(f"Aguardando shards em {caminhos['shards']}...")
+        time.sleep(INTERVALO_ESPERA)
+    os.makedirs(caminhos["processados"], exist_ok=True)
+    os.makedirs(caminhos["contagens"], exist_ok=True)
+
+    preprocessador = PreProcessadorEmail()
+    while True:
+        arquivo_shard = _reservar_shard(diretorio)
+        if arquivo_shard is None:
+            return
+        with _manter_lock(_caminho_lock(arquivo_shard)):
+            processar_shard(diretorio, arquivo_shard, preprocessador)
+
+
+def aguardar_shards(diretorio: str, tempo_limite: Optional[float] = TEMPO_LIMITE_ESPERA) -> List[str]:
+    """
+    Espera todos os shards terem contagens e retorna os nomes. Levanta
+    TimeoutError se ainda houver shards pendentes após tempo_limite segundos
+    (None espera indefinidamente).
+    """
+    caminhos = _caminhos(diretorio)
+    nomes = [_nome_shard(arquivo) for arquivo in glob.glob(os.path.join(caminhos["shards"], "shard_*.csv"))]
+    if not nomes:
+        raise FileNotFoundError(f"Nenhum shard encontrado em {caminhos['shards']}")
+
+    inicio = time.monotonic()
+    while True:
+        pendentes = sorted(
+            nome for nome in nomes
+            if not os.path.exists(os.path.join(caminhos["contagens"], f"{nome}.pkl"))
+        )
+        if not pendentes:
+            return sorted(nomes)
+
+        # Shards sem lock ativo não estão sendo processados por nenhum worker
+        locks = [os.path.join(caminhos["shards"], f"{nome}.lock") for nome in pendentes]
+        sem_worker = [lock for lock in locks if not os.path.exists(lock) or _lock_expirado(lock)]
+        if tempo_limite is not None and time.monotonic() - inicio >= tempo_limite:
+            raise TimeoutError(
+                f"{len(pendentes)} shards sem contagens após {tempo_limite:.0f}s "
+                f"({len(sem_worker)} sem worker ativo): {', '.join(pendentes[:5])}"
+            )
+        print(f"Aguardando {len(pendentes)} shards ({len(sem_worker)} sem worker ativo): "
+              f"{', '.join(pendentes[:5])}...")
+        time.sleep(INTERVALO_ESPERA)
+
+
+def mesclar_vocabulario(diretorio: str, nomes: List[str]):
+    """
+    Soma as contagens parciais e monta o TfidfVectorizer global, com o mesmo
+    vocabulário e idf que um ajuste sobre todo o conjunto de treino produziria.
+    Retorna (vetorizador, contagem de rótulos).
+    """
+    caminhos = _caminhos(diretorio)
+    frequencia_documentos = Counter()
+    frequencia_total = Counter()
+    labels = Counter()
+    num_documentos = 0
+
+    for nome in nomes:
+        contagens = joblib.load(os.path.join(caminhos["contagens"], f"{nome}.pkl"))
+        frequencia_documentos.update(contagens["df"])
+        frequencia_total.update(contagens["tf"])
+        labels.update(contagens["labels"])
+        num_documentos += contagens["documentos"]
+
+    # Mesmos critérios de min_df e max_features do TfidfVectorizer; empates na
+    # frequência de corte do max_features são desfeitos em ordem alfabética
+    min_df = PARAMETROS_TFIDF.get("min_df", 1)
+    min_documentos = min_df if isinstance(min_df, int) else min_df * num_documentos
+    termos = [termo for termo, df in frequencia_documentos.items() if df >= min_documentos]
+
+    max_features = PARAMETROS_TFIDF.get("max_features")
+    if max_features is not None and len(termos) > max_features:
+        termos = sorted(termos, key=lambda termo: (-frequencia_total[termo], termo))[:max_features]
+    termos.sort()
+
+    vetorizador = TfidfVectorizer(
+        ngram_range=PARAMETROS_TFIDF["ngram_range"],
+        vocabulary={termo: indice for indice, termo in enumerate(termos)}
+    )
+    df_termos = np.array([frequencia_documentos[termo] for termo in termos], dtype=np.float64)
+    # idf suavizado, como no TfidfTransformer (smooth_idf=True)
+    vetorizador.idf_ = np.log((1 + num_documentos) / (1 + df_termos)) + 1
+
+    print(f"Vocabulário global: {len(termos)} termos de {len(frequencia_documentos)} "
+          f"({num_documentos} documentos de treino)")
+    return vetorizador, labels
+
+
+def _blocos(diretorio: str, nomes: List[str], teste: bool, calibracao: Optional[bool] = None):
+    caminhos = _caminhos(diretorio)
+    for nome in nomes:
+        arquivo = os.path.join(caminhos["processados"], f"{nome}.csv")
+        for bloco in pd.read_csv(arquivo, encoding='utf-8', chunksize=TAMANHO_BLOCO):
+            bloco = bloco[bloco["teste"] == teste].dropna(subset=["texto_preprocessado", "label"])
+            if calibracao is not None:
+                bloco = bloco[bloco["texto"].astype(str).map(eh_calibracao) == calibracao]
+            if not bloco.empty:
+                yield bloco
+
+
+def calibrar(classificador, vetorizador, diretorio: str, nomes: List[str]):
+    """
+    Ajusta a calibração sigmoid (Platt) do classificador já treinado nos
+    emails de calibração. Sem eles (ou com um único rótulo), retorna o
+    classificador sem calibração; a API então desativa a saída antecipada.
+    """
+    matrizes, labels = [], []
+    for bloco in _blocos(diretorio, nomes, teste=True, calibracao=True):
+        bloco = bloco.head(MAX_EMAILS_CALIBRACAO - len(labels))
+        matrizes.append(vetorizador.transform(bloco["texto_preprocessado"]))
+        labels.extend(bloco["label"])
+        if len(labels) >= MAX_EMAILS_CALIBRACAO:
+            break
+
+    if len(set(labels)) < 2:
+        print("Aviso: emails de calibração insuficientes; modelo salvo sem calibração")
+        return classificador
+
+    if FrozenEstimator is not None:
+        calibrado = CalibratedClassifierCV(FrozenEstimator(classificador), method=PARAMETROS_CALIBRACAO["method"])
+    else:
+        calibrado = CalibratedClassifierCV(classificador, method=PARAMETROS_CALIBRACAO["method"], cv="prefit")
+    calibrado.fit(sp.vstack(matrizes).tocsr(), labels)
+    print(f"Probabilidades calibradas com {len(labels)} emails")
+    return calibrado
+
+
+def treinar_em_blocos(diretorio: str, arquivo_modelo: str,
+                      tempo_limite: Optional[float] = TEMPO_LIMITE_ESPERA) -> Pipeline:
+    nomes = aguardar_shards(diretorio, tempo_limite)
+    vetorizador, labels = mesclar_vocabulario(diretorio, nomes)
+
+    classes = np.array(sorted(labels))
+    total = sum(labels.values())
+    # Substitui a amostragem balanceada do treinamento em memória
+    pesos = {classe: total / (len(classes) * labels[classe]) for classe in classes}
+    classificador = SGDClassifier(loss="log_loss", class_weight=pesos, random_state=42)
+
+    gerador = np.random.default_rng(42)
+    for epoca in range(NUM_EPOCAS):
+        for nome in gerador.permutation(nomes):
+            for bloco in _blocos(diretorio, [nome], teste=False):
+                X = vetorizador.transform(bloco["texto_preprocessado"])
+                classificador.partial_fit(X, bloco["label"], classes=classes)
+        print(f"Época {epoca + 1}/{NUM_EPOCAS} concluída")
+
+    pipeline = Pipeline([
+        ("tfidf", vetorizador),
+        ("classificador", calibrar(classificador, vetorizador, diretorio, nomes))
+    ])
+    joblib.dump(pipeline, arquivo_modelo)
+    print(f"Modelo salvo em: {arquivo_modelo}")
+
+    y_teste, y_pred = [], []
+    for bloco in _blocos(diretorio, nomes, teste=True, calibracao=False):
+        y_teste.extend(bloco["label"])
+        y_pred.extend(pipeline.predict(bloco["texto_preprocessado"]))
+
+    if y_teste:
+        print("Acurácia:", accuracy_score(y_teste, y_pred))
+        print("\nRelatório de Classificação:")
+        print(classification_report(y_teste, y_pred))
+        print("\nMatriz de Confusão:")
+        print(confusion_matrix(y_teste, y_pred))
+
+    return pipeline
+
+
+def executar_local(arquivo_entrada: str, diretorio: str, num_shards: int, num_workers: int,
+                   arquivo_modelo: str) -> None:
+    """Executa todas as etapas com processos locais fazendo o papel dos nós"""
+    dividir_em_shards(arquivo_entrada, diretorio, num_shards)
+
+    workers = [Process(target=executar_worker, args=(diretorio,)) for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    falhas = [worker.exitcode for worker in workers if worker.exitcode != 0]
+    if falhas:
+        raise RuntimeError(f"{len(falhas)} de {num_workers} workers falharam (códigos de saída: {falhas})")
+
+    # Com todos os workers encerrados, não há o que esperar
+    treinar_em_blocos(diretorio, arquivo_modelo, tempo_limite=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-processamento e treinamento em shards")
+    parser.add_argument("etapa", choices=["dividir", "worker", "treinar", "local"])
+    parser.add_argument("--entrada", default=ARQUIVO_ENTRADA)
+    parser.add_argument("--diretorio", default=DIRETORIO_TRABALHO)
+    parser.add_argument("--modelo", default=ARQUIVO_MODELO)
+    parser.add_argument("--shards", type=int, default=NUM_SHARDS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--tempo-limite", type=float, default=TEMPO_LIMITE_ESPERA,
+                        help="segundos que 'treinar' espera pelos shards pendentes")
+    args = parser.parse_args()
+
+    if args.etapa == "dividir":
+        dividir_em_shards(args.entrada, args.diretorio, args.shards)
+    elif args.etapa == "worker":
+        executar_worker(args.diretorio)
+    elif args.etapa == "treinar":
+        treinar_em_blocos(args.diretorio, args.modelo, args.tempo_limite)
+    else:
+        executar_local(args.entrada, args.diretorio, args.shards, args.workers, args.modelo)
@@ -4,68 +4,116 @@ import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, brier_score_loss
 
 
-df = pd.read_csv("../database/emails_processados.csv")
+ARQUIVO_ENTRADA = "../database/emails_processados.csv"
+ARQUIVO_MODELO = "modelo_classificacao.pkl"
 
-df = df.dropna(subset=["texto_preprocessado", "label"])
+# Parâmetros do TF-IDF compartilhados com o treinamento distribuído
+PARAMETROS_TFIDF = {
+    "max_features": 10000,
+    "ngram_range": (1, 2),
+    "min_df": 2,
+}
 
-df_balanceado = df.groupby('label', group_keys=False).apply(
-    lambda x: x.sample(n=min(len(x), 2000), random_state=42)
-)
+# Calibração de Platt (sigmoid) das probabilidades, usadas pela API para
+# decidir a saída antecipada de emails improdutivos
+PARAMETROS_CALIBRACAO = {
+    "method": "sigmoid",
+    "cv": 5,
+}
 
-df_balanceado = df_balanceado.sample(frac=1, random_state=42).reset_index(drop=True)
+# Limiares avaliados no relatório de saída antecipada
+LIMIARES_AVALIADOS = (0.8, 0.9, 0.95)
 
-X = df_balanceado["texto_preprocessado"]
-y = df_balanceado["label"]
 
+def treinar_modelo(arquivo_entrada: str, arquivo_modelo: str) -> None:
+    df = pd.read_csv(arquivo_entrada)
 
-X_treino, X_teste, y_treino, y_teste = train_test_split(
-    X,
-    y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y  # importante para classes balanceadas
-)
+    df = df.dropna(subset=["texto_preprocessado", "label"])
 
-pipeline = Pipeline([
-    ("tfidf", TfidfVectorizer(
-        max_features=10000,
-        ngram_range=(1, 2),
-        min_df=2
-    )),
-    ("classificador", LogisticRegression(
-        max_iter=1000,
-        n_jobs=-1
-    ))
-])
+    df_balanceado = df.groupby('label', group_keys=False).apply(
+        lambda x: x.sample(n=min(len(x), 2000), random_state=42)
+    )
 
-pipeline.fit(X_treino, y_treino)
+    df_balanceado = df_balanceado.sample(frac=1, random_state=42).reset_index(drop=True)
 
-# Salvar o modelo treinado
-joblib.dump(pipeline, "modelo_classificacao.pkl")
-print("Modelo salvo em: modelo_classificacao.pkl")
+    X = df_balanceado["texto_preprocessado"]
+    y = df_balanceado["label"]
 
-y_pred = pipeline.predict(X_teste)
 
-print("Acurácia:", accuracy_score(y_teste, y_pred))
-print("\nRelatório de Classificação:")
-print(classification_report(y_teste, y_pred))
+    X_treino, X_teste, y_treino, y_teste = train_test_split(
+        X,
+        y,
+        test_size=0.2,
+        random_state=42,
+        stratify=y  # importante para classes balanceadas
+    )
 
-print("\nMatriz de Confusão:")
-print(confusion_matrix(y_teste, y_pred))
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer(**PARAMETROS_TFIDF)),
+        ("classificador", CalibratedClassifierCV(
+            LogisticRegression(
+                max_iter=1000,
+                n_jobs=-1
+            ),
+            **PARAMETROS_CALIBRACAO
+        ))
+    ])
 
+    pipeline.fit(X_treino, y_treino)
 
+    # stop_words_ serve apenas para inspeção e ocupa memória em cada worker da API
+    if hasattr(pipeline.named_steps["tfidf"], "stop_words_"):
+        pipeline.named_steps["tfidf"].stop_words_ = None
 
-novos_emails = [
-    "preciso de sua assistência com o prazo do projeto",
-    "parabéns pelo excelente trabalho que você realizou",
-]
+    # Salvar o modelo treinado
+    joblib.dump(pipeline, arquivo_modelo)
+    print(f"Modelo salvo em: {arquivo_modelo}")
 
-predicoes = pipeline.predict(novos_emails)
+    y_pred = pipeline.predict(X_teste)
 
-for email, pred in zip(novos_emails, predicoes):
-    print(f"\nEmail: {email}")
-    print(f"Classe prevista: {pred}")
+    print("Acurácia:", accuracy_score(y_teste, y_pred))
+    print("\nRelatório de Classificação:")
+    print(classification_report(y_teste, y_pred))
+
+    print("\nMatriz de Confusão:")
+    print(confusion_matrix(y_teste, y_pred))
+
+    relatorio_saida_antecipada(pipeline, X_teste, y_teste)
+
+
+
+    novos_emails = [
+        "preciso de sua assistência com o prazo do projeto",
+        "parabéns pelo excelente trabalho que você realizou",
+    ]
+
+    predicoes = pipeline.predict(novos_emails)
+
+    for email, pred in zip(novos_emails, predicoes):
+        print(f"\nEmail: {email}")
+        print(f"Classe prevista: {pred}")
+
+
+def relatorio_saida_antecipada(pipeline, X_teste, y_teste, classe: str = "Improdutivo") -> None:
+    """Mostra, para cada limiar, quantos emails sairiam antecipadamente e com que precisão"""
+    classes = list(pipeline.named_steps["classificador"].classes_)
+    if classe not in classes:
+        return
+    probabilidades = pipeline.predict_proba(X_teste)[:, classes.index(classe)]
+    y_classe = (pd.Series(y_teste).to_numpy() == classe)
+
+    print(f"\nBrier score ({classe}):", brier_score_loss(y_classe, probabilidades))
+    print(f"\nSaída antecipada para {classe}:")
+    for limiar in LIMIARES_AVALIADOS:
+        saem = probabilidades >= limiar
+        precisao = y_classe[saem].mean() if saem.any() else float("nan")
+        print(f"  limiar {limiar:.2f}: {saem.mean():.1%} dos emails, precisão {precisao:.1%}")
+
+
+if __name__ == "__main__":
+    treinar_modelo(ARQUIVO_ENTRADA, ARQUIVO_MODELO)
@@ -0,0 +1,81 @@
+"""
+Utilitários de resposta HTTP compartilhados pela API Flask e pelo servidor
+assíncrono: arquivos estáticos carregados uma única vez (com ETag, gzip e
+GET condicional) e serialização JSON rápida.
+"""
+import gzip
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+# orjson é opcional: quando instalado, serializa bem mais rápido que o json padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def serializar_json(dados) -> bytes:
+    """Serializa em JSON compacto (UTF-8, sem espaços) usando orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(dados, option=orjson.OPT_SERIALIZE_NUMPY, default=_converter_numpy)
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":"), default=_converter_numpy).encode("utf-8")
+
+
+def _converter_numpy(valor):
+    # Escalares numpy que eventualmente escapem das conversões da API
+    if hasattr(valor, "item"):
+        return valor.item()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def aceita_gzip(accept_encoding: Optional[str]) -> bool:
+    """Indica se o cabeçalho Accept-Encoding aceita gzip (respeitando q=0)"""
+    for item in (accept_encoding or "").lower().split(","):
+        codificacao, _, parametros = item.strip().partition(";")
+        if codificacao.strip() in ("gzip", "*"):
+            return parametros.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class ArquivoEstatico:
+    """
+    Arquivo lido do disco uma única vez, com a versão gzip e os ETags
+    pré-calculados. As duas codificações têm ETags fortes distintos
+    (RFC 9110, 8.8.3); qualquer um deles valida o GET condicional.
+    """
+
+    def __init__(self, caminho: str, tipo: str):
+        with open(caminho, "rb") as arquivo:
+            self.conteudo = arquivo.read()
+        self.tipo = tipo
+        self.conteudo_gzip = gzip.compress(self.conteudo, compresslevel=9, mtime=0)
+        digest = hashlib.sha1(self.conteudo).hexdigest()
+        self.etag = f'"{digest}"'
+        self.etag_gzip = f'"{digest}-gzip"'
+
+    def responder(self, if_none_match: Optional[str] = None,
+                  accept_encoding: Optional[str] = None) -> Tuple[int, bytes, Dict[str, str]]:
+        """Retorna (codigo_http, corpo, cabecalhos) para uma requisição GET"""
+        usar_gzip = aceita_gzip(accept_encoding)
+        cabecalhos = {
+            "ETag": self.etag_gzip if usar_gzip else self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        if if_none_match and self._etag_confere(if_none_match):
+            return 304, b"", cabecalhos
+
+        cabecalhos["Content-Type"] = self.tipo
+        if usar_gzip:
+            cabecalhos["Content-Encoding"] = "gzip"
+            return 200, self.conteudo_gzip, cabecalhos
+        return 200, self.conteudo, cabecalhos
+
+    def _etag_confere(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        # Aceita ETags fracos (W/"...") como equivalentes, conforme a RFC 9110
+        etags = (etag.strip().removeprefix("W/") for etag in if_none_match.split(","))
+        return any(etag in (self.etag, self.etag_gzip) for etag in etags)